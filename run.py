@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 import argparse
+import functools
+import hashlib
 import os
 import platform
+import re
 import shutil
 import subprocess
 import sys
@@ -10,9 +13,15 @@ from pathlib import Path
 
 SCRIPT_DIR = Path(__file__).parent.absolute()
 VENV_DIR = SCRIPT_DIR / ".venv"
+REQ_STAMP_FILE = VENV_DIR / ".req-stamp"
 DATA_DIR = SCRIPT_DIR / "data"
 ENV_FILE = SCRIPT_DIR / ".env"
 REQUIREMENTS_FILE = SCRIPT_DIR / "requirements.txt"
+LOCK_FILE = SCRIPT_DIR / "requirements.lock"
+REQUIRED_ENV_KEYS = ("DASHSCOPE_API_KEY", "ISO_PATH", "AVATAR_PATH")
+ENV_LINE_PATTERN = re.compile(r"^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)[ \t]*$", re.MULTILINE)
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "42agent"
+VENV_TEMPLATE_DIR = CACHE_DIR / f"venv-template-{sys.version_info.major}{sys.version_info.minor}"
 
 
 def print_status(message: str, status: str = "INFO"):
@@ -20,18 +29,25 @@ def print_status(message: str, status: str = "INFO"):
     print(f"{colors.get(status, colors['INFO'])}[{status}]{colors['RESET']} {message}")
 
 
+@functools.lru_cache(maxsize=None)
+def project_files() -> frozenset[str]:
+    """Names in the project root, read once so file checks don't each cost a stat()."""
+    with os.scandir(SCRIPT_DIR) as entries:
+        return frozenset(entry.name for entry in entries)
+
+
+def project_file_exists(path: Path) -> bool:
+    return path.name in project_files()
+
+
 def load_env():
-    if not ENV_FILE.exists():
+    # Environment already provided (container, service unit): no need to parse .env
+    if all(key in os.environ for key in REQUIRED_ENV_KEYS):
+        return {key: os.environ[key] for key in REQUIRED_ENV_KEYS}
+
+    if not project_file_exists(ENV_FILE):
         return {}
-    
-    env = {}
-    with open(ENV_FILE) as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith("#") and "=" in line:
-                key, value = line.split("=", 1)
-                env[key.strip()] = value.strip()
-    return env
+    return dict(ENV_LINE_PATTERN.findall(ENV_FILE.read_text()))
 
 
 def detect_linux_distro() -> str:
@@ -49,26 +65,57 @@ def detect_linux_distro() -> str:
     return "debian"
 
 
+def scan_path(names) -> set[str]:
+    """Return which of names are executable files on PATH, with one listdir per directory."""
+    wanted = set(names)
+    exts = ("",)
+    windows = platform.system() == "Windows"
+    if windows:
+        exts += tuple(e.lower() for e in os.environ.get("PATHEXT", ".EXE").split(os.pathsep) if e)
+    found = set()
+    for d in os.environ.get("PATH", "").split(os.pathsep):
+        if not d or found == wanted:
+            continue
+        try:
+            entries = os.listdir(d)
+        except OSError:
+            continue
+        if windows:
+            entries = [e.lower() for e in entries]
+        entries = set(entries)
+        for name in wanted - found:
+            for ext in exts:
+                candidate = name + ext
+                # Same checks as shutil.which: a regular file the user may execute
+                if candidate in entries:
+                    path = Path(d, candidate)
+                    if path.is_file() and os.access(path, os.X_OK):
+                        found.add(name)
+                        break
+    return found
+
+
 def check_system_dependencies() -> list[str]:
     missing = []
     system = platform.system().lower()
+    on_path = scan_path(("qemu-system-x86_64", "qemu-img", "cmake", "make", "gcc", "cc"))
     
     # QEMU dependencies
     if system == "linux":
-        if not shutil.which("qemu-system-x86_64"):
+        if "qemu-system-x86_64" not in on_path:
             missing.append("qemu-system-x86_64")
-        if not shutil.which("qemu-img"):
+        if "qemu-img" not in on_path:
             missing.append("qemu-img")
     elif system == "darwin":
-        if not shutil.which("qemu-system-x86_64"):
+        if "qemu-system-x86_64" not in on_path:
             missing.append("qemu (brew install qemu)")
     
     # Live2D build dependencies (cmake, make, gcc)
-    if not shutil.which("cmake"):
+    if "cmake" not in on_path:
         missing.append("cmake")
-    if not shutil.which("make"):
+    if "make" not in on_path:
         missing.append("make")
-    if not shutil.which("gcc") and not shutil.which("cc"):
+    if "gcc" not in on_path and "cc" not in on_path:
         missing.append("gcc")
     
     return missing
@@ -98,16 +145,43 @@ def get_venv_python() -> Path:
     return VENV_DIR / "bin" / "python"
 
 
-def get_venv_pip() -> Path:
-    if platform.system() == "Windows":
-        return VENV_DIR / "Scripts" / "pip.exe"
-    return VENV_DIR / "bin" / "pip"
+def get_venv_pip() -> list[str]:
+    # Run pip as a module: console scripts in a cloned venv point at the template's interpreter
+    return [str(get_venv_python()), "-m", "pip"]
+
+
+def clone_venv(src: Path, dst: Path) -> bool:
+    # Real copies (pip rewrites files in place) and no stamps, so every clone is
+    # installed against and verified on its own
+    try:
+        shutil.copytree(
+            src, dst, symlinks=True,
+            ignore=shutil.ignore_patterns(REQ_STAMP_FILE.name, ".verified-*")
+        )
+        return True
+    except Exception as e:
+        print_status(f"Failed to clone venv: {e}", "WARN")
+        shutil.rmtree(dst, ignore_errors=True)
+        return False
+
+
+def save_venv_template():
+    if VENV_TEMPLATE_DIR.exists() or not VENV_DIR.exists():
+        return
+    VENV_TEMPLATE_DIR.parent.mkdir(parents=True, exist_ok=True)
+    if clone_venv(VENV_DIR, VENV_TEMPLATE_DIR):
+        print_status(f"Cached venv template: {VENV_TEMPLATE_DIR}", "OK")
 
 
 def create_venv() -> bool:
     if VENV_DIR.exists():
         print_status(f"Virtual environment exists", "OK")
         return True
+    if VENV_TEMPLATE_DIR.exists():
+        print_status("Cloning virtual environment from cache...")
+        if clone_venv(VENV_TEMPLATE_DIR, VENV_DIR):
+            print_status("Virtual environment created", "OK")
+            return True
     print_status("Creating virtual environment...")
     try:
         venv.create(VENV_DIR, with_pip=True)
@@ -118,36 +192,88 @@ def create_venv() -> bool:
         return False
 
 
+def requirements_hash() -> str:
+    digest = hashlib.sha256(REQUIREMENTS_FILE.read_bytes())
+    if project_file_exists(LOCK_FILE):
+        digest.update(LOCK_FILE.read_bytes())
+    return digest.hexdigest()
+
+
+def get_install_command() -> list[str]:
+    # A hash-pinned lockfile lets the installer skip dependency resolution entirely
+    if project_file_exists(LOCK_FILE):
+        args = ["--no-deps", "--require-hashes", "-r", str(LOCK_FILE)]
+    else:
+        args = ["-r", str(REQUIREMENTS_FILE)]
+
+    uv = shutil.which("uv")
+    if uv:
+        return [uv, "pip", "install", "--python", str(get_venv_python()), *args]
+    if "--require-hashes" in args:
+        # Hash mode rejects any unpinned requirement, including a bare "pip" upgrade
+        return [*get_venv_pip(), "install", *args]
+    return [*get_venv_pip(), "install", "--upgrade", "pip", *args]
+
+
+def get_verified_stamp() -> Path:
+    return VENV_DIR / f".verified-{requirements_hash()[:16]}"
+
+
 def install_dependencies() -> bool:
-    pip = get_venv_pip()
-    if not REQUIREMENTS_FILE.exists():
+    if not project_file_exists(REQUIREMENTS_FILE):
         print_status(f"Requirements file not found", "ERROR")
         return False
 
-    print_status("Upgrading pip...")
-    subprocess.run([str(pip), "install", "--upgrade", "pip"], capture_output=True)
+    req_hash = requirements_hash()
+    try:
+        up_to_date = REQ_STAMP_FILE.read_text().strip() == req_hash
+    except FileNotFoundError:
+        up_to_date = False
+    if up_to_date:
+        print_status("Dependencies up to date", "OK")
+        return True
 
     print_status("Installing dependencies...")
-    result = subprocess.run([str(pip), "install", "-r", str(REQUIREMENTS_FILE)], capture_output=True, text=True)
+    result = subprocess.run(get_install_command(), capture_output=True, text=True)
     if result.returncode != 0:
         print_status(f"Installation failed: {result.stderr}", "ERROR")
         return False
+    REQ_STAMP_FILE.write_text(req_hash)
     print_status("Dependencies installed", "OK")
     return True
 
 
+VERIFY_SCRIPT = """
+import sys
+for name in sys.argv[1:]:
+    try:
+        __import__(name)
+    except Exception:
+        print(name)
+"""
+
+
 def verify_dependencies() -> tuple[bool, list[str]]:
+    stamp = get_verified_stamp()
+    if stamp.exists():
+        print_status("Dependencies verified (cached)", "OK")
+        return True, []
+
     python = get_venv_python()
     print_status("Verifying dependencies...")
-    packages = ["websockets", "dashscope", "PyQt6", "pyaudio", "PIL", "lancedb", "sentence_transformers", "vncdotool", "qasync", "OpenGL", "live2d.v3"]
-    broken = []
-    for pkg in packages:
-        result = subprocess.run([str(python), "-c", f"import {pkg}"], capture_output=True)
-        if result.returncode != 0:
-            broken.append(pkg)
+    packages = ["websockets", "PyQt6", "pyaudio", "PIL", "lancedb", "sentence_transformers", "qasync", "OpenGL", "live2d.v3"]
+    # Import everything in one interpreter instead of paying startup cost per package
+    result = subprocess.run([str(python), "-c", VERIFY_SCRIPT, *packages], capture_output=True, text=True)
+    if result.returncode != 0:
+        broken = packages
+    else:
+        broken = [line.strip() for line in result.stdout.splitlines() if line.strip() in packages]
     if broken:
         print_status(f"Broken packages: {', '.join(broken)}", "WARN")
         return False, broken
+    for old in VENV_DIR.glob(".verified-*"):
+        old.unlink()
+    stamp.touch()
     print_status("All dependencies verified", "OK")
     return True, []
 
@@ -162,15 +288,14 @@ def repair_dependencies(broken: list[str]) -> bool:
         "OpenGL": "PyOpenGL",
         "live2d.v3": "live2d-py",
     }
-    for pkg in broken:
-        actual = pkg_map.get(pkg, pkg)
-        if actual == "live2d-py" and not shutil.which("cmake"):
-            print_status("live2d-py requires cmake, make, gcc to build. Please install them first.", "ERROR")
-            return False
-        result = subprocess.run([str(pip), "install", "--force-reinstall", actual], capture_output=True)
-        if result.returncode != 0:
-            print_status(f"Failed to repair {actual}", "ERROR")
-            return False
+    actuals = [pkg_map.get(pkg, pkg) for pkg in broken]
+    if "live2d-py" in actuals and "cmake" not in scan_path(("cmake",)):
+        print_status("live2d-py requires cmake, make, gcc to build. Please install them first.", "ERROR")
+        return False
+    result = subprocess.run([*pip, "install", "--force-reinstall", *actuals], capture_output=True)
+    if result.returncode != 0:
+        print_status(f"Failed to repair {', '.join(actuals)}", "ERROR")
+        return False
     print_status("Packages repaired", "OK")
     return True
 
@@ -220,7 +345,10 @@ def main():
         if VENV_DIR.exists():
             print_status("Removing virtual environment...")
             shutil.rmtree(VENV_DIR)
-            print_status("Clean complete", "OK")
+        if VENV_TEMPLATE_DIR.exists():
+            print_status("Removing cached venv template...")
+            shutil.rmtree(VENV_TEMPLATE_DIR)
+        print_status("Clean complete", "OK")
 
     missing_sys = check_system_dependencies()
     if missing_sys:
@@ -244,6 +372,9 @@ def main():
                 print_status("Dependencies still broken", "ERROR")
                 sys.exit(1)
 
+    if ok:
+        save_venv_template()
+
     setup_data_dirs()
 
     if args.check_only:
@@ -4,6 +4,7 @@ Core Agent42 implementation - the main autonomous agent controller.
 
 import asyncio
 import logging
+import time
 from typing import Optional
 
 from .omni_client import OmniRealtimeClient, SessionConfig
@@ -14,6 +15,9 @@ logger = logging.getLogger(__name__)
 
 
 class Agent42:
+    AUDIO_QUEUE_SIZE = 16
+    FRAME_QUEUE_SIZE = 2
+
     def __init__(
         self,
         api_key: Optional[str] = None,
@@ -33,8 +37,10 @@ class Agent42:
         self.tools = ToolExecutor()
 
         self._running = False
-        self._audio_queue: asyncio.Queue[bytes] = asyncio.Queue()
-        self._frame_queue: asyncio.Queue[bytes] = asyncio.Queue()
+        self._audio_queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=self.AUDIO_QUEUE_SIZE)
+        self._frame_queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=self.FRAME_QUEUE_SIZE)
+        self._text_queue: asyncio.Queue[str] = asyncio.Queue()
+        self._text_task: Optional[asyncio.Task] = None
 
         self.on_speech_output: Optional[callable] = None
         self.on_text_output: Optional[callable] = None
@@ -50,14 +56,23 @@ class Agent42:
 
     def _on_text_received(self, text: str):
         logger.debug(f"Agent text: {text}")
-        asyncio.create_task(self._process_text(text))
+        self._text_queue.put_nowait(text)
+
+    async def _text_consumer_loop(self):
+        while True:
+            text = await self._text_queue.get()
+            try:
+                await self._process_text(text)
+            except Exception as e:
+                logger.error(f"Text processing error: {e}")
 
     async def _process_text(self, text: str):
-        results = await self.tools.execute_all(text)
-        for tool, result in results:
-            logger.info(f"Tool {tool.name} result: {result}")
+        tools, clean_text = self.tools.split_tools(text)
+        if tools:
+            results = await self.tools.execute_calls(tools)
+            for tool, result in results:
+                logger.info(f"Tool {tool.name} result: {result}")
 
-        clean_text = self.tools.strip_tools(text)
         if clean_text and self.on_text_output:
             self.on_text_output(clean_text)
 
@@ -90,11 +105,19 @@ class Agent42:
             raise RuntimeError("Failed to connect to Qwen API")
 
         self._running = True
+        self._text_task = asyncio.create_task(self._text_consumer_loop())
         logger.info("Agent42 is now active")
 
     async def stop(self):
         logger.info("Stopping Agent42...")
         self._running = False
+        if self._text_task:
+            self._text_task.cancel()
+            try:
+                await self._text_task
+            except asyncio.CancelledError:
+                pass
+            self._text_task = None
         await self.client.disconnect()
         logger.info("Agent42 stopped")
 
@@ -102,41 +125,74 @@ class Agent42:
         if self.client.is_connected:
             await self.client.send_audio(audio_data)
 
-    async def send_frame(self, frame_data: bytes):
+    async def send_frame(self, frame_data: bytes, leading_audio: Optional[bytes] = None):
         if self.client.is_connected:
+            # send_image flushes queued audio first, so both go out in one pass, in order
+            if leading_audio:
+                self.client.queue_audio(leading_audio)
             await self.client.send_image(frame_data)
 
-    async def run_audio_stream(self, audio_source):
+    @staticmethod
+    def _put_drop_oldest(queue: asyncio.Queue, item: bytes):
+        # Bounded backpressure: a stalled consumer drops stale items instead of growing the queue
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(item)
+
+    async def _drain_queue(self, queue: asyncio.Queue, send):
         while self._running:
+            item = await queue.get()
             try:
-                audio_chunk = await asyncio.wait_for(
-                    audio_source.read(),
-                    timeout=0.1
-                )
-                if audio_chunk:
-                    await self.send_audio(audio_chunk)
-            except asyncio.TimeoutError:
-                continue
+                await send(item)
             except Exception as e:
-                logger.error(f"Audio stream error: {e}")
-                break
+                logger.error(f"Stream send error: {e}")
+
+    async def run_audio_stream(self, audio_source):
+        sender = asyncio.create_task(self._drain_queue(self._audio_queue, self.send_audio))
+        try:
+            while self._running:
+                try:
+                    audio_chunk = await asyncio.wait_for(
+                        audio_source.read(),
+                        timeout=0.1
+                    )
+                    if audio_chunk:
+                        self._put_drop_oldest(self._audio_queue, audio_chunk)
+                except asyncio.TimeoutError:
+                    continue
+                except Exception as e:
+                    logger.error(f"Audio stream error: {e}")
+                    break
+        finally:
+            sender.cancel()
 
     async def run_video_stream(self, frame_source, fps: int = 30):
         frame_interval = 1.0 / fps
-        while self._running:
-            try:
-                frame = await asyncio.wait_for(
-                    frame_source.read(),
-                    timeout=frame_interval
-                )
-                if frame:
-                    await self.send_frame(frame)
-                await asyncio.sleep(frame_interval)
-            except asyncio.TimeoutError:
-                continue
-            except Exception as e:
-                logger.error(f"Video stream error: {e}")
-                break
+        sender = asyncio.create_task(self._drain_queue(self._frame_queue, self.send_frame))
+        next_deadline = time.monotonic()
+        try:
+            while self._running:
+                try:
+                    frame = await asyncio.wait_for(
+                        frame_source.read(),
+                        timeout=frame_interval
+                    )
+                    if frame:
+                        self._put_drop_oldest(self._frame_queue, frame)
+                except asyncio.TimeoutError:
+                    pass
+                except Exception as e:
+                    logger.error(f"Video stream error: {e}")
+                    break
+
+                next_deadline += frame_interval
+                delay = next_deadline - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    next_deadline = time.monotonic()
+        finally:
+            sender.cancel()
 
     @property
     def is_running(self) -> bool:
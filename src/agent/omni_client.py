@@ -3,10 +3,11 @@ Qwen3-Omni-Flash Realtime WebSocket Client for real-time omnimodal interaction.
 """
 
 import asyncio
-import base64
+import itertools
 import json
 import logging
 import os
+from binascii import a2b_base64, b2a_base64
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Callable, Optional
@@ -14,6 +15,17 @@ from typing import Callable, Optional
 import websockets
 from websockets.client import WebSocketClientProtocol
 
+try:
+    import orjson
+
+    def _dumps(data: dict) -> str:
+        return orjson.dumps(data).decode()
+
+    _loads = orjson.loads
+except ImportError:
+    _dumps = json.dumps
+    _loads = json.loads
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,6 +43,7 @@ class SessionConfig:
     output_audio_format: str = "pcm24"
     modalities: list = field(default_factory=lambda: ["text", "audio"])
     instructions: str = ""
+    store_full_audio: bool = False
     turn_detection: Optional[dict] = field(default_factory=lambda: {
         "type": "server_vad",
         "threshold": 0.5,
@@ -42,6 +55,8 @@ class OmniRealtimeClient:
     API_URL_INTL = "wss://dashscope-intl.aliyuncs.com/api-ws/v1/realtime"
     API_URL_CN = "wss://dashscope.aliyuncs.com/api-ws/v1/realtime"
     MODEL = "qwen3-omni-flash-realtime"
+    AUDIO_FLUSH_INTERVAL = 0.06
+    AUDIO_FLUSH_BYTES = 6400
 
     def __init__(
         self,
@@ -57,7 +72,7 @@ class OmniRealtimeClient:
         self.config = config or SessionConfig()
         self.state = ConnectionState.DISCONNECTED
         self.ws: Optional[WebSocketClientProtocol] = None
-        self._event_id_counter = 0
+        self._next_event_id = itertools.count(1).__next__
 
         self.on_text_delta: Optional[Callable[[str], None]] = None
         self.on_text_done: Optional[Callable[[str], None]] = None
@@ -70,12 +85,25 @@ class OmniRealtimeClient:
         self.on_error: Optional[Callable[[str], None]] = None
 
         self._receive_task: Optional[asyncio.Task] = None
-        self._text_buffer = ""
-        self._audio_buffer = b""
+        self._audio_flush_task: Optional[asyncio.Task] = None
+        self._audio_tx_buffer = bytearray()
+        self._text_buffer: list[str] = []
+        self._audio_buffer = bytearray()
+
+        self._dispatch: dict[str, Callable[[dict], None]] = {
+            "response.text.delta": self._handle_text_delta,
+            "response.text.done": self._handle_text_done,
+            "response.audio.delta": self._handle_audio_delta,
+            "response.audio.done": self._handle_audio_done,
+            "response.audio_transcript.delta": self._handle_transcript_delta,
+            "conversation.item.input_audio_transcription.completed": self._handle_input_transcript,
+            "input_audio_buffer.speech_started": self._handle_speech_started,
+            "input_audio_buffer.speech_stopped": self._handle_speech_stopped,
+            "error": self._handle_error,
+        }
 
     def _generate_event_id(self) -> str:
-        self._event_id_counter += 1
-        return f"evt_{self._event_id_counter:08d}"
+        return f"evt_{self._next_event_id():08d}"
 
     async def connect(self) -> bool:
         if self.state == ConnectionState.CONNECTED:
@@ -96,6 +124,7 @@ class OmniRealtimeClient:
             logger.info(f"Connected to {self.MODEL}")
 
             self._receive_task = asyncio.create_task(self._receive_loop())
+            self._audio_flush_task = asyncio.create_task(self._audio_flush_loop())
             await self._update_session()
             return True
 
@@ -107,6 +136,15 @@ class OmniRealtimeClient:
             return False
 
     async def disconnect(self):
+        if self._audio_flush_task:
+            self._audio_flush_task.cancel()
+            try:
+                await self._audio_flush_task
+            except asyncio.CancelledError:
+                pass
+            self._audio_flush_task = None
+        self._audio_tx_buffer.clear()
+
         if self._receive_task:
             self._receive_task.cancel()
             try:
@@ -138,14 +176,14 @@ class OmniRealtimeClient:
 
     async def _send(self, data: dict):
         if self.ws and self.state == ConnectionState.CONNECTED:
-            await self.ws.send(json.dumps(data))
+            await self.ws.send(_dumps(data))
 
     async def _receive_loop(self):
         try:
             if self.ws is None:
                 return
             async for message in self.ws:
-                await self._handle_message(json.loads(message))
+                await self._handle_message(_loads(message))
         except websockets.ConnectionClosed:
             logger.info("Connection closed")
             self.state = ConnectionState.DISCONNECTED
@@ -154,66 +192,92 @@ class OmniRealtimeClient:
             self.state = ConnectionState.ERROR
 
     async def _handle_message(self, data: dict):
-        event_type = data.get("type", "")
-
-        if event_type == "response.text.delta":
-            delta = data.get("delta", "")
-            self._text_buffer += delta
-            if self.on_text_delta:
-                self.on_text_delta(delta)
-
-        elif event_type == "response.text.done":
-            if self.on_text_done:
-                self.on_text_done(self._text_buffer)
-            self._text_buffer = ""
-
-        elif event_type == "response.audio.delta":
-            audio_b64 = data.get("delta", "")
-            if audio_b64:
-                audio_bytes = base64.b64decode(audio_b64)
-                self._audio_buffer += audio_bytes
-                if self.on_audio_delta:
-                    self.on_audio_delta(audio_bytes)
-
-        elif event_type == "response.audio.done":
-            if self.on_audio_done:
-                self.on_audio_done()
-            self._audio_buffer = b""
-
-        elif event_type == "response.audio_transcript.delta":
-            delta = data.get("delta", "")
-            if self.on_transcript_delta:
-                self.on_transcript_delta(delta)
-
-        elif event_type == "conversation.item.input_audio_transcription.completed":
-            transcript = data.get("transcript", "")
-            if self.on_input_transcript:
-                self.on_input_transcript(transcript)
-
-        elif event_type == "input_audio_buffer.speech_started":
-            if self.on_speech_started:
-                self.on_speech_started()
-
-        elif event_type == "input_audio_buffer.speech_stopped":
-            if self.on_speech_stopped:
-                self.on_speech_stopped()
-
-        elif event_type == "error":
-            error_msg = data.get("error", {}).get("message", "Unknown error")
-            logger.error(f"API Error: {error_msg}")
-            if self.on_error:
-                self.on_error(error_msg)
+        handler = self._dispatch.get(data.get("type", ""))
+        if handler:
+            handler(data)
+
+    def _handle_text_delta(self, data: dict):
+        delta = data.get("delta", "")
+        self._text_buffer.append(delta)
+        if self.on_text_delta:
+            self.on_text_delta(delta)
+
+    def _handle_text_done(self, data: dict):
+        if self.on_text_done:
+            self.on_text_done("".join(self._text_buffer))
+        self._text_buffer.clear()
+
+    def _handle_audio_delta(self, data: dict):
+        audio_b64 = data.get("delta", "")
+        if audio_b64:
+            audio_bytes = a2b_base64(audio_b64)
+            if self.config.store_full_audio:
+                self._audio_buffer.extend(audio_bytes)
+            if self.on_audio_delta:
+                self.on_audio_delta(audio_bytes)
+
+    def _handle_audio_done(self, data: dict):
+        if self.on_audio_done:
+            self.on_audio_done()
+        self._audio_buffer.clear()
+
+    def _handle_transcript_delta(self, data: dict):
+        delta = data.get("delta", "")
+        if self.on_transcript_delta:
+            self.on_transcript_delta(delta)
+
+    def _handle_input_transcript(self, data: dict):
+        transcript = data.get("transcript", "")
+        if self.on_input_transcript:
+            self.on_input_transcript(transcript)
+
+    def _handle_speech_started(self, data: dict):
+        if self.on_speech_started:
+            self.on_speech_started()
+
+    def _handle_speech_stopped(self, data: dict):
+        if self.on_speech_stopped:
+            self.on_speech_stopped()
+
+    def _handle_error(self, data: dict):
+        error_msg = data.get("error", {}).get("message", "Unknown error")
+        logger.error(f"API Error: {error_msg}")
+        if self.on_error:
+            self.on_error(error_msg)
+
+    def queue_audio(self, audio_data: bytes):
+        """Append audio to the outbound buffer without sending; the next flush carries it."""
+        self._audio_tx_buffer.extend(audio_data)
 
     async def send_audio(self, audio_data: bytes):
-        audio_b64 = base64.b64encode(audio_data).decode("ascii")
+        # Small microphone chunks are coalesced and sent by _audio_flush_loop
+        self._audio_tx_buffer.extend(audio_data)
+        if len(self._audio_tx_buffer) >= self.AUDIO_FLUSH_BYTES:
+            await self.flush_audio()
+
+    async def flush_audio(self):
+        if not self._audio_tx_buffer:
+            return
+        audio_b64 = b2a_base64(self._audio_tx_buffer, newline=False).decode("ascii")
+        self._audio_tx_buffer.clear()
         await self._send({
             "event_id": self._generate_event_id(),
             "type": "input_audio_buffer.append",
             "audio": audio_b64
         })
 
+    async def _audio_flush_loop(self):
+        while True:
+            await asyncio.sleep(self.AUDIO_FLUSH_INTERVAL)
+            try:
+                await self.flush_audio()
+            except Exception as e:
+                logger.error(f"Audio flush error: {e}")
+
     async def send_image(self, image_data: bytes):
-        image_b64 = base64.b64encode(image_data).decode("ascii")
+        # The API expects audio before the image it accompanies
+        await self.flush_audio()
+        image_b64 = b2a_base64(image_data, newline=False).decode("ascii")
         await self._send({
             "event_id": self._generate_event_id(),
             "type": "input_image_buffer.append",
@@ -221,6 +285,7 @@ class OmniRealtimeClient:
         })
 
     async def commit_audio(self):
+        await self.flush_audio()
         await self._send({
             "event_id": self._generate_event_id(),
             "type": "input_audio_buffer.commit"
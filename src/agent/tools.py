@@ -3,34 +3,101 @@ Tool parser and executor for Agent42.
 Parses <tool> tags from model output and executes corresponding actions.
 """
 
+import asyncio
 import logging
 import re
-from dataclasses import dataclass
-from typing import Any, Callable, Optional
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
 
 logger = logging.getLogger(__name__)
 
+# Tool tags are plain ASCII; the literal "<tool" prefix also serves as a cheap prefilter
+TOOL_PREFIX = "<tool"
 TOOL_PATTERN = re.compile(
     r'<tool\s+name="([^"]+)"([^/>]*)/?>(?:</tool>)?',
-    re.IGNORECASE | re.DOTALL
+    re.ASCII
 )
 
 ATTR_PATTERN = re.compile(r'(\w+)="([^"]*)"')
 
-
-@dataclass
+# Coordinate params that VM tools consume as ints
+INT_PARAM_KEYS = frozenset({"x", "y", "start_x", "start_y", "end_x", "end_y"})
+INT_VALUE_PATTERN = re.compile(r'-?\d+', re.ASCII)
+
+
+def parse_attrs(attrs_str: str) -> dict[str, str]:
+    """Scan well-formed `key="value"` lists with str.find, falling back to ATTR_PATTERN."""
+    params = {}
+    pos = 0
+    while True:
+        eq = attrs_str.find('="', pos)
+        if eq < 0:
+            return params
+        end = attrs_str.find('"', eq + 2)
+        if end < 0:
+            return params
+        key = attrs_str[pos:eq].strip()
+        if not key.isidentifier():
+            return dict(ATTR_PATTERN.findall(attrs_str))
+        params[key] = attrs_str[eq + 2:end]
+        pos = end + 1
+
+
+@dataclass(slots=True)
 class ToolCall:
     name: str
     params: dict[str, str]
+    int_params: dict[str, int] = field(init=False, default_factory=dict)
+
+    def __post_init__(self):
+        for key in INT_PARAM_KEYS.intersection(self.params):
+            value = self.params[key].strip()
+            # Malformed values are left out here and reported when the tool runs
+            if INT_VALUE_PATTERN.fullmatch(value):
+                self.int_params[key] = int(value)
 
 
 class ToolExecutor:
+    # Each entry maps a tool name to a call on its controller with the params coerced
+    _VM_DISPATCH: dict[str, Callable[[Any, ToolCall], Awaitable[Any]]] = {
+        "mouse_move": lambda vm, t: vm.mouse_move(t.int_params["x"], t.int_params["y"]),
+        "mouse_click": lambda vm, t: vm.mouse_click(t.params.get("button", "left")),
+        "mouse_double_click": lambda vm, t: vm.mouse_double_click(t.params.get("button", "left")),
+        "mouse_drag": lambda vm, t: vm.mouse_drag(
+            t.int_params["start_x"], t.int_params["start_y"],
+            t.int_params["end_x"], t.int_params["end_y"]
+        ),
+        "key_press": lambda vm, t: vm.key_press(t.params["key"]),
+        "key_combo": lambda vm, t: vm.key_combo(t.params["keys"]),
+        "type_text": lambda vm, t: vm.type_text(t.params["text"]),
+        "screenshot": lambda vm, t: vm.screenshot(),
+    }
+
+    _AVATAR_DISPATCH: dict[str, Callable[[Any, dict], Awaitable[Any]]] = {
+        "avatar_expression": lambda avatar, p: avatar.set_expression(p["expression"]),
+        "avatar_motion": lambda avatar, p: avatar.play_motion(p["motion"]),
+        "avatar_look": lambda avatar, p: avatar.look_at(float(p["x"]), float(p["y"])),
+    }
+
+    _MEMORY_DISPATCH: dict[str, Callable[[Any, dict], Awaitable[Any]]] = {
+        "memory_save": lambda memory, p: memory.save(p["content"]),
+        "memory_search": lambda memory, p: memory.search(p["query"]),
+    }
+
     def __init__(self):
         self._handlers: dict[str, Callable[..., Any]] = {}
         self._vm_controller = None
         self._avatar_controller = None
         self._memory_manager = None
 
+        self._routes: dict[str, Callable[[ToolCall], Awaitable[Any]]] = {}
+        for names, executor in (
+            (self._VM_DISPATCH, self._execute_vm_tool),
+            (self._AVATAR_DISPATCH, self._execute_avatar_tool),
+            (self._MEMORY_DISPATCH, self._execute_memory_tool),
+        ):
+            self._routes.update(dict.fromkeys(names, executor))
+
     def set_vm_controller(self, controller):
         self._vm_controller = controller
 
@@ -41,129 +108,92 @@ class ToolExecutor:
         self._memory_manager = manager
 
     def register_handler(self, name: str, handler: Callable[..., Any]):
-        self._handlers[name] = handler
+        # Decide sync vs async once here instead of on every call
+        if asyncio.iscoroutinefunction(handler):
+            self._handlers[name] = handler
+            return
+
+        async def _wrapped(**params):
+            return handler(**params)
+
+        self._handlers[name] = _wrapped
+
+    @staticmethod
+    def _to_tool_call(match: re.Match) -> ToolCall:
+        name = match.group(1)
+        attrs_str = match.group(2)
+        params = parse_attrs(attrs_str)
+        return ToolCall(name=name, params=params)
 
     def parse_tools(self, text: str) -> list[ToolCall]:
-        tools = []
-        for match in TOOL_PATTERN.finditer(text):
-            name = match.group(1)
-            attrs_str = match.group(2)
-            params = dict(ATTR_PATTERN.findall(attrs_str))
-            tools.append(ToolCall(name=name, params=params))
-        return tools
+        if TOOL_PREFIX not in text:
+            return []
+        return [self._to_tool_call(match) for match in TOOL_PATTERN.finditer(text)]
 
     def strip_tools(self, text: str) -> str:
+        if TOOL_PREFIX not in text:
+            return text.strip()
         return TOOL_PATTERN.sub("", text).strip()
 
+    def split_tools(self, text: str) -> tuple[list[ToolCall], str]:
+        """Parse tool tags and strip them from the text in a single scan."""
+        if TOOL_PREFIX not in text:
+            return [], text.strip()
+        tools = []
+        parts = []
+        pos = 0
+        for match in TOOL_PATTERN.finditer(text):
+            parts.append(text[pos:match.start()])
+            pos = match.end()
+            tools.append(self._to_tool_call(match))
+        parts.append(text[pos:])
+        return tools, "".join(parts).strip()
+
     async def execute(self, tool: ToolCall) -> Optional[Any]:
         logger.info(f"Executing tool: {tool.name} with params: {tool.params}")
 
-        if tool.name in self._handlers:
-            handler = self._handlers[tool.name]
-            return await self._call_handler(handler, tool.params)
-
-        if tool.name.startswith("mouse_") or tool.name.startswith("key_") or tool.name == "type_text" or tool.name == "screenshot":
-            return await self._execute_vm_tool(tool)
-
-        if tool.name.startswith("avatar_"):
-            return await self._execute_avatar_tool(tool)
+        handler = self._handlers.get(tool.name)
+        if handler:
+            return await handler(**tool.params)
 
-        if tool.name.startswith("memory_"):
-            return await self._execute_memory_tool(tool)
+        executor = self._routes.get(tool.name)
+        if executor:
+            return await executor(tool)
 
         logger.warning(f"Unknown tool: {tool.name}")
         return None
 
-    async def _call_handler(self, handler: Callable, params: dict) -> Any:
-        import asyncio
-        if asyncio.iscoroutinefunction(handler):
-            return await handler(**params)
-        return handler(**params)
-
     async def _execute_vm_tool(self, tool: ToolCall) -> Optional[Any]:
         if not self._vm_controller:
             logger.error("VM controller not set")
             return None
-
-        vm = self._vm_controller
-
-        if tool.name == "mouse_move":
-            x, y = int(tool.params["x"]), int(tool.params["y"])
-            await vm.mouse_move(x, y)
-
-        elif tool.name == "mouse_click":
-            button = tool.params.get("button", "left")
-            await vm.mouse_click(button)
-
-        elif tool.name == "mouse_double_click":
-            button = tool.params.get("button", "left")
-            await vm.mouse_double_click(button)
-
-        elif tool.name == "mouse_drag":
-            start_x = int(tool.params["start_x"])
-            start_y = int(tool.params["start_y"])
-            end_x = int(tool.params["end_x"])
-            end_y = int(tool.params["end_y"])
-            await vm.mouse_drag(start_x, start_y, end_x, end_y)
-
-        elif tool.name == "key_press":
-            key = tool.params["key"]
-            await vm.key_press(key)
-
-        elif tool.name == "key_combo":
-            keys = tool.params["keys"]
-            await vm.key_combo(keys)
-
-        elif tool.name == "type_text":
-            text = tool.params["text"]
-            await vm.type_text(text)
-
-        elif tool.name == "screenshot":
-            return await vm.screenshot()
-
-        return None
+        try:
+            return await self._VM_DISPATCH[tool.name](self._vm_controller, tool)
+        except KeyError as e:
+            key = e.args[0]
+            if key in INT_PARAM_KEYS:
+                error = f"invalid coordinate {key}={tool.params.get(key)!r}"
+            else:
+                error = f"missing parameter {key}"
+            logger.error(f"Tool {tool.name}: {error}")
+            return f"Error: {error}"
 
     async def _execute_avatar_tool(self, tool: ToolCall) -> Optional[Any]:
         if not self._avatar_controller:
             logger.error("Avatar controller not set")
             return None
-
-        avatar = self._avatar_controller
-
-        if tool.name == "avatar_expression":
-            expression = tool.params["expression"]
-            await avatar.set_expression(expression)
-
-        elif tool.name == "avatar_motion":
-            motion = tool.params["motion"]
-            await avatar.play_motion(motion)
-
-        elif tool.name == "avatar_look":
-            x = float(tool.params["x"])
-            y = float(tool.params["y"])
-            await avatar.look_at(x, y)
-
-        return None
+        return await self._AVATAR_DISPATCH[tool.name](self._avatar_controller, tool.params)
 
     async def _execute_memory_tool(self, tool: ToolCall) -> Optional[Any]:
         if not self._memory_manager:
             logger.error("Memory manager not set")
             return None
-
-        memory = self._memory_manager
-
-        if tool.name == "memory_save":
-            content = tool.params["content"]
-            await memory.save(content)
-
-        elif tool.name == "memory_search":
-            query = tool.params["query"]
-            return await memory.search(query)
-
-        return None
+        return await self._MEMORY_DISPATCH[tool.name](self._memory_manager, tool.params)
 
     async def execute_all(self, text: str) -> list[tuple[ToolCall, Any]]:
-        tools = self.parse_tools(text)
+        return await self.execute_calls(self.parse_tools(text))
+
+    async def execute_calls(self, tools: list[ToolCall]) -> list[tuple[ToolCall, Any]]:
         results = []
         for tool in tools:
             result = await self.execute(tool)
@@ -6,13 +6,36 @@ Analyzes audio amplitude to control mouth movements.
 import asyncio
 import logging
 import math
-import struct
 from collections import deque
 from typing import Optional
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
+def _rms_int16_numpy(samples: np.ndarray, scratch: np.ndarray) -> float:
+    squares = scratch[:samples.size]
+    np.multiply(samples, samples, out=squares, dtype=np.float32)
+    return math.sqrt(float(squares.sum()) / samples.size)
+
+
+# Use a JIT-compiled kernel when numba is installed (no float32 temporary per chunk)
+try:
+    from numba import njit
+
+    @njit(cache=True, fastmath=True)
+    def _rms_int16_jit(samples, scratch):
+        acc = 0.0
+        for s in samples:
+            acc += float(s) * float(s)
+        return math.sqrt(acc / samples.size)
+
+    rms_int16 = _rms_int16_jit
+except ImportError:
+    rms_int16 = _rms_int16_numpy
+
+
 class LipSyncController:
     def __init__(
         self,
@@ -29,6 +52,13 @@ class LipSyncController:
         self._current_value = 0.0
         self._target_value = 0.0
         self._amplitude_history: deque[float] = deque(maxlen=10)
+        self._amplitude_sum = 0.0
+        # Incoming PCM lands in a ring (2x capacity so the newest window is always
+        # contiguous); RMS is computed once per renderer tick instead of per chunk
+        self._pcm_ring = np.zeros(sample_rate * 2, dtype=np.int16)
+        self._ring_pos = 0
+        self._ring_pending = 0
+        self._scratch = np.empty(sample_rate, dtype=np.float32)
         self._renderer = None
 
     def set_renderer(self, renderer):
@@ -39,36 +69,73 @@ class LipSyncController:
             return
 
         try:
-            samples = struct.unpack(f"<{len(audio_data) // 2}h", audio_data)
+            samples = np.frombuffer(audio_data, dtype="<i2", count=len(audio_data) // 2)
 
-            if not samples:
-                return
+            ring = self._pcm_ring
+            capacity = ring.size // 2
+            n = samples.size
+            if n > capacity:
+                samples = samples[-capacity:]
+                n = capacity
 
-            rms = math.sqrt(sum(s * s for s in samples) / len(samples))
-            normalized = rms / 32768.0
+            pos = self._ring_pos
+            if pos + n > ring.size:
+                keep = capacity - n
+                ring[:keep] = ring[pos - keep:pos]
+                pos = keep
 
-            self._amplitude_history.append(normalized)
-            avg_amplitude = sum(self._amplitude_history) / len(self._amplitude_history)
-
-            if avg_amplitude < self.threshold:
-                self._target_value = 0.0
-            else:
-                self._target_value = min(1.0, avg_amplitude * self.sensitivity)
+            ring[pos:pos + n] = samples
+            self._ring_pos = pos + n
+            self._ring_pending = min(self._ring_pending + n, capacity)
 
         except Exception as e:
             logger.error(f"Lip sync processing error: {e}")
 
-    def update(self, delta_time: float):
+    def _analyze_pending(self, delta_time: float):
+        n = min(self._ring_pending, max(1, int(self.sample_rate * delta_time)))
+        self._ring_pending = 0
+
+        pos = self._ring_pos
+        rms = rms_int16(self._pcm_ring[pos - n:pos], self._scratch)
+        normalized = rms / 32768.0
+
+        history = self._amplitude_history
+        if len(history) == history.maxlen:
+            self._amplitude_sum -= history[0]
+        history.append(normalized)
+        self._amplitude_sum += normalized
+        avg_amplitude = self._amplitude_sum / len(history)
+
+        if avg_amplitude < self.threshold:
+            self._target_value = 0.0
+        else:
+            self._target_value = min(1.0, avg_amplitude * self.sensitivity)
+
+    def update(self, delta_time: float) -> bool:
+        """Advance smoothing; returns False when the mouth value did not change."""
+        if self._ring_pending:
+            self._analyze_pending(delta_time)
+
         diff = self._target_value - self._current_value
-        self._current_value += diff * min(1.0, self.smoothing * delta_time * 60)
+        if abs(diff) < 1e-4:
+            # Settled: snap to the target once, then leave the renderer alone
+            if diff == 0.0:
+                return False
+            self._current_value = self._target_value
+        else:
+            self._current_value += diff * min(1.0, self.smoothing * delta_time * 60)
 
         if self._renderer:
-            self._renderer.set_mouth_open(self._current_value)
+            self._renderer.set_mouth_open_fast(max(0.0, min(1.0, self._current_value)))
+        return True
 
     def reset(self):
         self._current_value = 0.0
         self._target_value = 0.0
         self._amplitude_history.clear()
+        self._amplitude_sum = 0.0
+        self._ring_pos = 0
+        self._ring_pending = 0
 
         if self._renderer:
             self._renderer.set_mouth_open(0.0)
@@ -5,7 +5,6 @@ Integrates with PyQt6 OpenGL for model rendering.
 
 import logging
 import os
-import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional, Callable
@@ -27,7 +26,7 @@ except ImportError:
     logger.warning("live2d-py not installed. Run: pip install live2d-py")
 
 
-@dataclass
+@dataclass(slots=True)
 class AvatarConfig:
     model_path: str
     position_x: float = 0.7
@@ -67,7 +66,7 @@ class Live2DRenderer:
         self._look_x = 0.0
         self._look_y = 0.0
         self._mouth_open = 0.0
-        self._last_update = time.time()
+        self._mouth_param: Optional[str] = None
         self._width = 800
         self._height = 600
         self._offset_x = 0.0
@@ -161,6 +160,7 @@ class Live2DRenderer:
             # Enable auto features
             self._model.SetAutoBlinkEnable(True)
             self._model.SetAutoBreathEnable(True)
+            self._mouth_param = StandardParams.ParamMouthOpenY if StandardParams else None
             
             # Start idle motion
             self._start_idle_motion()
@@ -171,6 +171,7 @@ class Live2DRenderer:
         except Exception as e:
             logger.error(f"Failed to load Live2D model: {e}")
             self._model = None
+            self._mouth_param = None
             return False
 
     def _start_idle_motion(self):
@@ -220,15 +221,16 @@ class Live2DRenderer:
 
     async def set_expression(self, expression: str):
         """Set the model expression."""
-        if expression in self.EXPRESSIONS:
-            self._current_expression = expression
-            if self._model and LIVE2D_AVAILABLE:
-                try:
-                    exp_name = self.EXPRESSIONS.get(expression, "Normal")
-                    self._model.SetExpression(exp_name)
-                    logger.debug(f"Expression set to: {expression} ({exp_name})")
-                except Exception as e:
-                    logger.debug(f"Could not set expression: {e}")
+        exp_name = self.EXPRESSIONS.get(expression)
+        if exp_name is None:
+            return
+        self._current_expression = expression
+        if self._model and LIVE2D_AVAILABLE:
+            try:
+                self._model.SetExpression(exp_name)
+                logger.debug(f"Expression set to: {expression} ({exp_name})")
+            except Exception as e:
+                logger.debug(f"Could not set expression: {e}")
 
     async def play_motion(self, motion: str):
         """Play a motion animation."""
@@ -262,14 +264,22 @@ class Live2DRenderer:
         """Set mouth openness for lip sync (0.0 to 1.0)."""
         self._mouth_open = max(0.0, min(1.0, value))
         
-        if self._model and LIVE2D_AVAILABLE and StandardParams:
-            try:
-                self._model.SetParameterValue(
-                    StandardParams.ParamMouthOpenY,
-                    self._mouth_open
-                )
-            except Exception as e:
-                logger.debug(f"Could not set mouth parameter: {e}")
+        if self._mouth_param is not None and self._model is not None:
+            self._write_mouth_param(self._mouth_open)
+
+    def set_mouth_open_fast(self, value: float):
+        """Set mouth openness from an already-clamped value (lip-sync hot path)."""
+        self._mouth_open = value
+        if self._mouth_param is not None:
+            self._write_mouth_param(value)
+
+    def _write_mouth_param(self, value: float):
+        try:
+            self._model.SetParameterValue(self._mouth_param, value)
+        except Exception as e:
+            # Model lacks the parameter or went away: stop lip sync instead of failing every frame
+            logger.warning(f"Disabling lip sync, mouth parameter write failed: {e}")
+            self._mouth_param = None
 
     def set_offset(self, x: float, y: float):
         """Set model position offset."""
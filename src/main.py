@@ -7,12 +7,13 @@ import asyncio
 import logging
 import os
 import sys
+from collections import deque
 from pathlib import Path
 from typing import Optional
 
 import pyaudio
 from PyQt6.QtWidgets import QApplication
-from qasync import QEventLoop, asyncSlot, asyncClose
+from qasync import QEventLoop
 
 from .agent.core import Agent42
 from .memory.rag import RAGMemory
@@ -24,12 +25,22 @@ from .avatar.live2d_renderer import Live2DRenderer, AvatarConfig
 from .avatar.lip_sync import LipSyncController
 from .ui.main_window import MainWindow
 
+# Fast non-cryptographic digest for spotting unchanged frames; builtin hash() otherwise
+try:
+    from xxhash import xxh3_64_intdigest as frame_digest
+except ImportError:
+    frame_digest = hash
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 )
 logger = logging.getLogger(__name__)
 
+# Qwen3-Omni API requires audio to be sent before/with images.
+# When no microphone, send silent audio with each frame to satisfy this requirement.
+SILENT_AUDIO = b'\x00' * 3200  # 100ms of silence at 16kHz mono 16-bit
+
 
 class Agent42Application:
     def __init__(
@@ -60,7 +71,13 @@ class Agent42Application:
         self._speaker_stream = None
         self._audio_interface = None
         self._running = False
+        self._streams_task: Optional[asyncio.Task] = None
         self._has_microphone = False
+        self._latest_frame_slot: asyncio.Queue[bytes] = asyncio.Queue(maxsize=1)
+        self._last_frame_hash = 0
+        self._mic_queue: asyncio.Queue[bytes] = asyncio.Queue()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._play_buffer: deque[memoryview] = deque()
 
     async def initialize(self) -> bool:
         logger.info("Initializing 42Agent...")
@@ -74,7 +91,8 @@ class Agent42Application:
             memory="4096",
             cpus=2,
             vnc_port=5900,
-            qmp_port=4444
+            qmp_port=4444,
+            disk_aio=os.getenv("VM_DISK_AIO") or None
         )
         self.vm_manager = QEMUManager(vm_config, str(self.data_dir / "vm"))
 
@@ -103,13 +121,13 @@ class Agent42Application:
         if not await self.vm_manager.start():
             raise RuntimeError("Failed to start VM")
 
-        await asyncio.sleep(3)
-
         logger.info("Connecting to VM control...")
-        if not await self.qmp.connect():
+        # Both retry until QEMU's sockets come up; wait for them side by side
+        qmp_ok, vnc_ok = await asyncio.gather(self.qmp.connect(), self.vnc.connect())
+        if not qmp_ok:
             raise RuntimeError("Failed to connect to QMP")
 
-        if not await self.vnc.connect():
+        if not vnc_ok:
             raise RuntimeError("Failed to connect to VNC")
 
         logger.info("Initializing avatar...")
@@ -126,7 +144,9 @@ class Agent42Application:
 
         # Start video stream (VM display should always work)
         self._running = True
-        asyncio.create_task(self._run_streams())
+        self.vnc.set_frame_callback(self._handle_frame)
+        await self.vnc.start_streaming()
+        self._streams_task = asyncio.create_task(self._run_streams())
         logger.info("Video stream started")
 
         # Agent connection is optional - continue even if it fails
@@ -140,82 +160,103 @@ class Agent42Application:
 
     def _setup_audio(self):
         self._audio_interface = pyaudio.PyAudio()
+        self._loop = asyncio.get_running_loop()
 
         self._mic_stream = self._audio_interface.open(
             format=pyaudio.paInt16,
             channels=1,
             rate=16000,
             input=True,
-            frames_per_buffer=3200
+            frames_per_buffer=3200,
+            stream_callback=self._mic_callback
         )
 
         self._speaker_stream = self._audio_interface.open(
             format=pyaudio.paInt16,
             channels=1,
             rate=24000,
-            output=True
+            output=True,
+            stream_callback=self._speaker_callback
         )
 
-    async def _run_streams(self):
-        video_task = asyncio.create_task(self._video_stream_loop())
-        audio_task = asyncio.create_task(self._audio_stream_loop())
+    def _mic_callback(self, in_data, frame_count, time_info, status):
+        """PortAudio delivers capture buffers on its own thread; hand them to the loop."""
+        self._loop.call_soon_threadsafe(self._mic_queue.put_nowait, in_data)
+        return None, pyaudio.paContinue
+
+    def _speaker_callback(self, in_data, frame_count, time_info, status):
+        """PortAudio pulls playback data on its own thread; pad with silence on underrun."""
+        needed = frame_count * 2
+        out = bytearray(needed)  # zero-filled, so an underrun is already silence
+        filled = 0
+        while filled < needed and self._play_buffer:
+            chunk = self._play_buffer.popleft()
+            take = min(len(chunk), needed - filled)
+            out[filled:filled + take] = chunk[:take]
+            filled += take
+            if len(chunk) > take:
+                # memoryview slice: the unplayed tail is requeued without copying
+                self._play_buffer.appendleft(chunk[take:])
+        data = bytes(out)
+        if filled:
+            # Drive lip sync from what is actually being played, not from arrival
+            played = data if filled == needed else data[:filled]
+            self._loop.call_soon_threadsafe(self.lip_sync.process_audio, played)
+        return data, pyaudio.paContinue
 
-        await asyncio.gather(video_task, audio_task)
+    async def _run_streams(self):
+        await asyncio.gather(self._audio_stream_loop(), self._agent_send_loop())
 
-    async def _video_stream_loop(self):
-        # Qwen3-Omni API requires audio to be sent before/with images
-        # When no microphone, send silent audio periodically to satisfy this requirement
-        silent_audio = b'\x00' * 3200  # 100ms of silence at 16kHz mono 16-bit
-        
-        while self._running:
+    def _handle_frame(self, frame: bytes, width: int = 0, height: int = 0, fmt: Optional[str] = None):
+        # Update UI first (always works)
+        if self.window:
+            self.window.update_vm_frame(frame, width, height, fmt)
+        # The realtime API only takes encoded images, never raw pixels
+        if fmt is not None or not (self.agent and self.agent.client.is_connected):
+            return
+        # Idle desktops repeat the same frame; don't spend API traffic on it
+        frame_hash = frame_digest(frame)
+        if frame_hash == self._last_frame_hash:
+            return
+        self._last_frame_hash = frame_hash
+        # Single-slot buffer: a newer frame replaces one the sender hasn't picked up yet
+        slot = self._latest_frame_slot
+        if slot.full():
+            slot.get_nowait()
+        slot.put_nowait(frame)
+
+    async def _agent_send_loop(self):
+        # Blocks on the queue; stop() ends it by cancelling _streams_task
+        while True:
+            frame = await self._latest_frame_slot.get()
             try:
-                frame = await self.vnc.capture_frame()
-                if frame:
-                    # Update UI first (always works)
-                    if self.window:
-                        self.window.update_vm_frame(frame)
-                    # Send to agent (may fail if not connected)
-                    try:
-                        if self.agent and self.agent.client.is_connected:
-                            # API requires audio before/with image - send silent audio if no mic
-                            if not self._has_microphone:
-                                await self.agent.send_audio(silent_audio)
-                            await self.agent.send_frame(frame)
-                    except Exception as e:
-                        # Agent not connected, but continue showing VM
-                        pass
-                await asyncio.sleep(1 / 30)
-            except Exception as e:
-                logger.error(f"Video stream error: {e}")
-                await asyncio.sleep(0.1)
+                # API requires audio before/with image - send silent audio if no mic
+                await self.agent.send_frame(
+                    frame, None if self._has_microphone else SILENT_AUDIO
+                )
+            except Exception:
+                # Agent not connected, but continue showing VM
+                pass
 
     async def _audio_stream_loop(self):
         if not self._mic_stream:
             logger.info("Audio stream disabled (no microphone)")
             return
         
-        while self._running:
+        while True:
+            audio_data = await self._mic_queue.get()
             try:
-                audio_data = await asyncio.to_thread(
-                    self._mic_stream.read,
-                    3200,
-                    exception_on_overflow=False
-                )
                 if self.agent:
                     await self.agent.send_audio(audio_data)
-                await asyncio.sleep(0.01)
             except Exception as e:
                 logger.error(f"Audio stream error: {e}")
-                await asyncio.sleep(0.1)
 
     def _on_agent_speech(self, audio_data: bytes):
         if self._speaker_stream:
-            self._speaker_stream.write(audio_data)
-
-        self.lip_sync.process_audio(audio_data)
-
-        if self.window:
-            self.window.process_audio(audio_data)
+            # Lip sync follows playback in _speaker_callback
+            self._play_buffer.append(memoryview(audio_data))
+        else:
+            self.lip_sync.process_audio(audio_data)
 
     def _on_agent_text(self, text: str):
         if self.window:
@@ -228,14 +269,18 @@ class Agent42Application:
     async def _on_user_message(self, text: str):
         await self.conversation.add_message("user", text)
 
-    def run_ui(self):
-        """Deprecated: UI is now initialized in main() with proper event loop integration."""
-        pass
-
     async def stop(self):
         logger.info("Stopping 42Agent...")
         self._running = False
 
+        if self._streams_task:
+            self._streams_task.cancel()
+            try:
+                await self._streams_task
+            except asyncio.CancelledError:
+                pass
+            self._streams_task = None
+
         if self.agent:
             await self.agent.stop()
 
@@ -272,7 +317,8 @@ def main(iso_path: str, avatar_path: str):
     # Initialize Live2D library globally (must be before any model creation)
     Live2DRenderer.global_init()
     
-    # Create qasync event loop that integrates asyncio with Qt
+    # Create qasync event loop that integrates asyncio with Qt.
+    # Alternative loop policies (uvloop/winloop) can't be used here: Qt must own the loop.
     loop = QEventLoop(qt_app)
     asyncio.set_event_loop(loop)
     
@@ -293,7 +339,6 @@ def main(iso_path: str, avatar_path: str):
         app.window.set_message_callback(
             lambda msg: asyncio.create_task(app._on_user_message(msg))
         )
-        app.vnc.set_frame_callback(app.window.update_vm_frame)
         app.window.show()
         
         # Start backend services (VM, VNC, etc.) after UI is visible
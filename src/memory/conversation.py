@@ -8,6 +8,7 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
 from collections import deque
+from itertools import chain, islice
 
 from .rag import RAGMemory
 
@@ -40,6 +41,7 @@ class ConversationManager:
 
         self._messages: deque[Message] = deque(maxlen=max_messages)
         self._archive_lock = asyncio.Lock()
+        self._archive_task: Optional[asyncio.Task] = None
 
     async def add_message(
         self,
@@ -54,42 +56,53 @@ class ConversationManager:
         )
         self._messages.append(message)
 
-        if len(self._messages) >= self.archive_threshold:
-            asyncio.create_task(self._archive_old_messages())
+        # At most one archive task in flight; a burst of messages shouldn't queue one each
+        if len(self._messages) >= self.archive_threshold and (
+            self._archive_task is None or self._archive_task.done()
+        ):
+            self._archive_task = asyncio.create_task(self._archive_old_messages())
 
     async def _archive_old_messages(self):
         async with self._archive_lock:
             if len(self._messages) < self.archive_threshold:
                 return
 
-            messages_to_archive = []
             archive_count = len(self._messages) - (self.archive_threshold // 2)
 
-            for _ in range(archive_count):
-                if self._messages:
-                    messages_to_archive.append(self._messages.popleft())
+            # Split the deque in one pass instead of popping message by message
+            old = self._messages
+            messages_to_archive = list(islice(old, archive_count))
+            self._messages = deque(islice(old, archive_count, None), maxlen=self.max_messages)
 
-            for msg in messages_to_archive:
-                await self.memory.save_conversation(
-                    role=msg.role,
-                    content=msg.content,
+            try:
+                await self.memory.save_conversations(
+                    [(msg.role, msg.content) for msg in messages_to_archive],
                     session_id=self.session_id
                 )
+            except Exception as e:
+                # Background task: log instead of raising, and keep the slice for a later archive
+                logger.error(f"Failed to archive messages: {e}")
+                self._messages = deque(
+                    chain(messages_to_archive, self._messages), maxlen=self.max_messages
+                )
+                return
 
             logger.info(f"Archived {len(messages_to_archive)} messages to RAG")
 
+    def _iter_recent(self, count: Optional[int] = None):
+        total = len(self._messages)
+        if count is None or count >= total:
+            return iter(self._messages)
+        return islice(self._messages, total - count, None)
+
     def get_recent_messages(self, count: Optional[int] = None) -> list[Message]:
-        if count is None:
-            return list(self._messages)
-        return list(self._messages)[-count:]
+        return list(self._iter_recent(count))
 
     def format_for_context(self, count: Optional[int] = None) -> str:
-        messages = self.get_recent_messages(count)
-        formatted = []
-        for msg in messages:
-            role_prefix = "User" if msg.role == "user" else "Agent42"
-            formatted.append(f"{role_prefix}: {msg.content}")
-        return "\n".join(formatted)
+        return "\n".join(
+            f"{'User' if msg.role == 'user' else 'Agent42'}: {msg.content}"
+            for msg in self._iter_recent(count)
+        )
 
     async def get_full_context(
         self,
@@ -114,13 +127,17 @@ class ConversationManager:
 
     async def summarize_and_archive_all(self):
         async with self._archive_lock:
-            for msg in self._messages:
-                await self.memory.save_conversation(
-                    role=msg.role,
-                    content=msg.content,
-                    session_id=self.session_id
-                )
+            # Take the messages before awaiting so anything appended meanwhile isn't cleared unsaved
+            snapshot = list(self._messages)
             self._messages.clear()
+            try:
+                await self.memory.save_conversations(
+                    [(msg.role, msg.content) for msg in snapshot], session_id=self.session_id
+                )
+            except BaseException:
+                # Save failed: put the snapshot back ahead of anything appended meanwhile
+                self._messages = deque(chain(snapshot, self._messages), maxlen=self.max_messages)
+                raise
             logger.info("Archived all messages")
 
     @property
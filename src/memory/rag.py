@@ -4,87 +4,274 @@ RAG-based long-term memory system using LanceDB for unlimited conversation histo
 
 import asyncio
 import hashlib
+import itertools
 import logging
+import math
 import os
+import queue
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
 import lancedb
+import numpy as np
 import pyarrow as pa
 from sentence_transformers import SentenceTransformer
 
 logger = logging.getLogger(__name__)
 
+# ONNX Runtime serves the same model with fused CPU kernels (sentence-transformers >= 3.2)
+try:
+    import onnxruntime  # noqa: F401
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+
+def _sql_literal(value) -> str:
+    # Double single quotes so values can't break out of the SQL string literal
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+@lru_cache(maxsize=64)
+def _where_clause(items: tuple) -> str:
+    """Build an equality predicate from sorted (column, value) pairs."""
+    for name, _ in items:
+        # Column names go into the SQL unquoted, so only plain identifiers are allowed
+        if not isinstance(name, str) or not name.isidentifier():
+            raise ValueError(f"Invalid metadata filter key: {name!r}")
+    return " AND ".join(f"{name} = {_sql_literal(value)}" for name, value in items)
+
 
 class RAGMemory:
     TABLE_NAME = "agent42_memory"
     DEFAULT_MODEL = "all-MiniLM-L6-v2"
+    # Brute-force search is fine for small tables; past this size build a PQ index
+    INDEX_MIN_ROWS = 10000
+    EMBED_BATCH_SIZE = 32
+    EMBED_COALESCE_WINDOW = 0.005
+    EMBED_CACHE_SIZE = 4096
+    EMBEDDING_BACKENDS = {
+        "torch": {},
+        "onnx": {"backend": "onnx"},
+        # Dynamically quantized int8 export shipped with the sentence-transformers models
+        "onnx-int8": {
+            "backend": "onnx",
+            "model_kwargs": {"file_name": "onnx/model_qint8_avx512_vnni.onnx"},
+        },
+    }
 
     def __init__(
         self,
         persist_dir: str = "./data/memory",
-        embedding_model: Optional[str] = None
+        embedding_model: Optional[str] = None,
+        embedding_backend: Optional[str] = None
     ):
         self.persist_dir = persist_dir
         os.makedirs(persist_dir, exist_ok=True)
 
         self.db = lancedb.connect(persist_dir)
+        self._id_salt = os.urandom(16)
+        self._id_counter = itertools.count()
 
         model_name = embedding_model or self.DEFAULT_MODEL
-        self.embedder = SentenceTransformer(model_name)
+        backend = embedding_backend or ("onnx" if ONNX_AVAILABLE else "torch")
+        self.embedder = self._load_embedder(model_name, backend)
         self._embedding_dim = self.embedder.get_sentence_embedding_dimension()
 
+        # One long-lived worker encodes all requests, coalescing bursts into a single batch
+        self._embed_jobs: queue.Queue = queue.Queue()
+        self._embed_cache: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self._embed_thread = threading.Thread(
+            target=self._embed_worker, name="rag-embedder", daemon=True
+        )
+        self._embed_thread.start()
+
         self._init_table()
         logger.info(f"RAG Memory initialized with {model_name}")
 
+    def _load_embedder(self, model_name: str, backend: str) -> SentenceTransformer:
+        kwargs = self.EMBEDDING_BACKENDS.get(backend)
+        if kwargs is None:
+            logger.warning(f"Unknown embedding backend '{backend}', using torch")
+        elif kwargs:
+            try:
+                embedder = SentenceTransformer(model_name, **kwargs)
+                logger.info(f"Embedding backend: {backend}")
+                return embedder
+            except Exception as e:
+                logger.warning(f"Could not load {backend} embedder, using torch: {e}")
+        return SentenceTransformer(model_name)
+
     def _init_table(self):
         """Initialize the memory table if it doesn't exist."""
         if self.TABLE_NAME in self.db.table_names():
             self.table = self.db.open_table(self.TABLE_NAME)
+            self._row_count = self.table.count_rows()
+            self._index_rows = self._row_count if self._has_index() else 0
         else:
+            # New tables store half-precision vectors; older tables keep their float32 schema
             schema = pa.schema([
                 pa.field("id", pa.string()),
                 pa.field("content", pa.string()),
-                pa.field("vector", pa.list_(pa.float32(), self._embedding_dim)),
+                pa.field("vector", pa.list_(pa.float16(), self._embedding_dim)),
                 pa.field("timestamp", pa.string()),
                 pa.field("type", pa.string()),
                 pa.field("role", pa.string()),
                 pa.field("session_id", pa.string()),
             ])
             self.table = self.db.create_table(self.TABLE_NAME, schema=schema)
+            self._row_count = 0
+            self._index_rows = 0
+        vector_type = self.table.schema.field("vector").type.value_type
+        self._vector_dtype = np.float16 if vector_type == pa.float16() else np.float32
+
+    def _has_index(self) -> bool:
+        try:
+            return bool(list(self.table.list_indices()))
+        except Exception:
+            return False
+
+    def _needs_index(self) -> bool:
+        # Build once the table is large, then rebuild whenever it has doubled since
+        threshold = max(self.INDEX_MIN_ROWS, 2 * self._index_rows)
+        return self._row_count >= threshold and self._embedding_dim % 8 == 0
+
+    def _build_index(self):
+        """Build an IVF_PQ index (8-dim sub-vectors, one byte each) over the current rows."""
+        rows = self._row_count
+        try:
+            self.table.create_index(
+                metric="l2",
+                num_partitions=int(math.sqrt(rows)),
+                num_sub_vectors=self._embedding_dim // 8,
+                replace=True,
+            )
+            logger.info(f"Built IVF_PQ index over {rows} memories")
+        except Exception as e:
+            logger.warning(f"Could not build vector index: {e}")
+        # Also on failure, so a broken build isn't retried until the table doubles
+        self._index_rows = rows
 
     def _generate_id(self, content: str) -> str:
-        timestamp = datetime.now().isoformat()
-        return hashlib.sha256(f"{content}{timestamp}".encode()).hexdigest()[:16]
+        # Salted content hash + per-process counter: 16 hex chars, no clock read
+        digest = hashlib.blake2b(content.encode(), digest_size=4, key=self._id_salt).hexdigest()
+        return f"{digest}{next(self._id_counter):08x}"
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result=None, error: Optional[Exception] = None):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
 
-    def _embed(self, text: str) -> list[float]:
-        return self.embedder.encode(text).tolist()
+    def _embed_worker(self):
+        while True:
+            jobs = [self._embed_jobs.get()]
+            pending = len(jobs[0][0])
+            while pending < self.EMBED_BATCH_SIZE:
+                try:
+                    job = self._embed_jobs.get(timeout=self.EMBED_COALESCE_WINDOW)
+                except queue.Empty:
+                    break
+                jobs.append(job)
+                pending += len(job[0])
+
+            texts = [text for job_texts, _, _ in jobs for text in job_texts]
+            try:
+                vectors = self._embed_batch(texts)
+            except Exception as e:
+                for _, future, loop in jobs:
+                    loop.call_soon_threadsafe(self._resolve, future, None, e)
+                continue
+
+            start = 0
+            for job_texts, future, loop in jobs:
+                end = start + len(job_texts)
+                loop.call_soon_threadsafe(self._resolve, future, vectors[start:end])
+                start = end
+
+    async def _encode(self, texts: list[str]) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._embed_jobs.put((texts, future, loop))
+        return await future
+
+    async def _embed(self, texts: list[str]) -> list[np.ndarray]:
+        # Short repeated turns ("ok", "yes") are served from an LRU keyed by content hash.
+        # Only the event loop touches the cache, so it needs no lock.
+        cache = self._embed_cache
+        keys = [hashlib.blake2b(text.encode(), digest_size=16).digest() for text in texts]
+        vectors = {}
+        missing = []
+        for text, key in zip(texts, keys):
+            vector = cache.get(key)
+            if vector is None:
+                missing.append((text, key))
+            else:
+                cache.move_to_end(key)
+                vectors[key] = vector
+
+        if missing:
+            encoded = await self._encode([text for text, _ in missing])
+            for (_, key), vector in zip(missing, encoded):
+                vectors[key] = vector
+                cache[key] = vector
+            while len(cache) > self.EMBED_CACHE_SIZE:
+                cache.popitem(last=False)
+
+        return [vectors[key] for key in keys]
+
+    def _embed_batch(self, texts: list[str]) -> np.ndarray:
+        return self.embedder.encode(
+            texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False
+        )
 
     async def save(
         self,
         content: str,
         metadata: Optional[dict] = None
     ) -> str:
-        doc_id = self._generate_id(content)
-        embedding = await asyncio.to_thread(self._embed, content)
+        doc_ids = await self.save_many([(content, metadata)])
+        return doc_ids[0]
+
+    async def save_many(
+        self,
+        items: list[tuple[str, Optional[dict]]]
+    ) -> list[str]:
+        """Embed and insert several memories with one forward pass and one table write."""
+        if not items:
+            return []
 
-        meta = metadata or {}
+        contents = [content for content, _ in items]
+        embeddings = await self._embed(contents)
         timestamp = datetime.now().isoformat()
+        metas = [metadata or {} for _, metadata in items]
+        doc_ids = [self._generate_id(content) for content in contents]
 
-        data = [{
-            "id": doc_id,
-            "content": content,
-            "vector": embedding,
-            "timestamp": timestamp,
-            "type": meta.get("type", "general"),
-            "role": meta.get("role", ""),
-            "session_id": meta.get("session_id", ""),
-        }]
+        # Build the Arrow batch column-wise so LanceDB doesn't infer types row by row
+        flat = np.asarray(embeddings, dtype=self._vector_dtype).ravel()
+        batch = pa.table({
+            "id": doc_ids,
+            "content": contents,
+            "vector": pa.FixedSizeListArray.from_arrays(pa.array(flat), self._embedding_dim),
+            "timestamp": [timestamp] * len(items),
+            "type": [meta.get("type", "general") for meta in metas],
+            "role": [meta.get("role", "") for meta in metas],
+            "session_id": [meta.get("session_id", "") for meta in metas],
+        })
 
-        await asyncio.to_thread(self.table.add, data)
+        await asyncio.to_thread(self.table.add, batch)
+        self._row_count += len(doc_ids)
+        if self._needs_index():
+            await asyncio.to_thread(self._build_index)
 
-        logger.debug(f"Saved memory: {doc_id}")
-        return doc_id
+        logger.debug(f"Saved {len(doc_ids)} memories")
+        return doc_ids
 
     async def search(
         self,
@@ -92,23 +279,28 @@ class RAGMemory:
         n_results: int = 5,
         filter_metadata: Optional[dict] = None
     ) -> list[dict]:
-        embedding = await asyncio.to_thread(self._embed, query)
+        embedding = (await self._embed([query]))[0]
 
-        search_query = self.table.search(embedding).limit(n_results)
+        # Skip the vector column: callers only need text and metadata
+        search_query = self.table.search(embedding).limit(n_results).select(
+            ["content", "timestamp", "type", "role", "session_id"]
+        )
 
         if filter_metadata:
-            conditions = []
-            for key, value in filter_metadata.items():
-                conditions.append(f"{key} = '{value}'")
-            if conditions:
-                search_query = search_query.where(" AND ".join(conditions))
+            # Prefilter so the metadata predicate prunes rows before the vector scan
+            # Values are stringified for the SQL literal anyway; doing it first keeps the
+            # cache key hashable for list or dict values
+            items = tuple(sorted((name, str(value)) for name, value in filter_metadata.items()))
+            search_query = search_query.where(_where_clause(items), prefilter=True)
 
         results = await asyncio.to_thread(search_query.to_list)
 
         memories = []
         for row in results:
+            content = row["content"]
             memories.append({
-                "content": row["content"],
+                "content": content,
+                "length": len(content),
                 "metadata": {
                     "timestamp": row["timestamp"],
                     "type": row["type"],
@@ -133,6 +325,18 @@ class RAGMemory:
         }
         return await self.save(content, metadata)
 
+    async def save_conversations(
+        self,
+        messages: list[tuple[str, str]],
+        session_id: Optional[str] = None
+    ) -> list[str]:
+        """Batch version of save_conversation for (role, content) pairs."""
+        session = session_id or "default"
+        return await self.save_many([
+            (content, {"type": "conversation", "role": role, "session_id": session})
+            for role, content in messages
+        ])
+
     async def get_relevant_context(
         self,
         query: str,
@@ -145,11 +349,10 @@ class RAGMemory:
         char_limit = max_tokens * 4
 
         for mem in memories:
-            content = mem["content"]
-            if total_chars + len(content) > char_limit:
+            total_chars += mem["length"]
+            if total_chars > char_limit:
                 break
-            context_parts.append(content)
-            total_chars += len(content)
+            context_parts.append(mem["content"])
 
         return "\n---\n".join(context_parts)
 
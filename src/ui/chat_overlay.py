@@ -6,7 +6,7 @@ Appears when user presses 'T' key.
 import logging
 from typing import Callable, Optional
 
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont
 from PyQt6.QtWidgets import (
     QWidget,
@@ -23,43 +23,64 @@ from PyQt6.QtWidgets import (
 logger = logging.getLogger(__name__)
 
 
+# Set once on the messages container; bubbles only carry a role property, so adding
+# one does not parse a stylesheet of its own
+MESSAGES_QSS = """
+    QFrame#MsgBubble, QFrame#MsgBubble QLabel {
+        background-color: #3A3A3C;
+        border-radius: 12px;
+        padding: 8px;
+        margin: 4px;
+    }
+    QFrame#MsgBubble[role="user"], QFrame#MsgBubble[role="user"] QLabel {
+        background-color: #007AFF;
+    }
+    QLabel#MsgRole {
+        color: #8E8E93;
+        font-size: 11px;
+        font-weight: bold;
+    }
+    QLabel#MsgContent {
+        color: white;
+        font-size: 14px;
+    }
+"""
+
+
 class MessageBubble(QFrame):
     def __init__(self, role: str, content: str, parent=None):
         super().__init__(parent)
         self.setFrameShape(QFrame.Shape.StyledPanel)
-
-        is_user = role.lower() == "user"
-
-        if is_user:
-            self.setStyleSheet("""
-                QFrame {
-                    background-color: #007AFF;
-                    border-radius: 12px;
-                    padding: 8px;
-                    margin: 4px;
-                }
-            """)
-        else:
-            self.setStyleSheet("""
-                QFrame {
-                    background-color: #3A3A3C;
-                    border-radius: 12px;
-                    padding: 8px;
-                    margin: 4px;
-                }
-            """)
+        self.setObjectName("MsgBubble")
+        self.setProperty("role", self._role_key(role))
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(12, 8, 12, 8)
 
-        role_label = QLabel(role.capitalize())
-        role_label.setStyleSheet("color: #8E8E93; font-size: 11px; font-weight: bold;")
-        layout.addWidget(role_label)
+        self.role_label = QLabel(role.capitalize())
+        self.role_label.setObjectName("MsgRole")
+        layout.addWidget(self.role_label)
+
+        self.content_label = QLabel(content)
+        self.content_label.setWordWrap(True)
+        self.content_label.setObjectName("MsgContent")
+        layout.addWidget(self.content_label)
 
-        content_label = QLabel(content)
-        content_label.setWordWrap(True)
-        content_label.setStyleSheet("color: white; font-size: 14px;")
-        layout.addWidget(content_label)
+    @staticmethod
+    def _role_key(role: str) -> str:
+        return "user" if role.lower() == "user" else "agent"
+
+    def configure(self, role: str, content: str):
+        """Reuse this bubble for another message."""
+        self.role_label.setText(role.capitalize())
+        self.content_label.setText(content)
+        role_key = self._role_key(role)
+        if self.property("role") != role_key:
+            self.setProperty("role", role_key)
+            # Property selectors are only re-evaluated on a re-polish
+            for widget in (self, self.role_label, self.content_label):
+                widget.style().unpolish(widget)
+                widget.style().polish(widget)
 
 
 class ChatOverlay(QWidget):
@@ -68,6 +89,12 @@ class ChatOverlay(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._send_callback: Optional[Callable[[str], None]] = None
+        self._pending: list[tuple[str, str]] = []
+        self._flush_scheduled = False
+        self._scroll_pending = False
+        self._last_geom: Optional[tuple[int, int, int, int]] = None
+        # Bubbles detached by clear_messages, reused before allocating new ones
+        self._bubble_pool: list[MessageBubble] = []
         self._setup_ui()
 
     def _setup_ui(self):
@@ -130,6 +157,7 @@ class ChatOverlay(QWidget):
         """)
 
         self.messages_container = QWidget()
+        self.messages_container.setStyleSheet(MESSAGES_QSS)
         self.messages_layout = QVBoxLayout(self.messages_container)
         self.messages_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
         self.messages_layout.setSpacing(8)
@@ -139,6 +167,7 @@ class ChatOverlay(QWidget):
         layout.addWidget(scroll, 1)
 
         self.scroll_area = scroll
+        scroll.verticalScrollBar().rangeChanged.connect(self._on_scroll_range_changed)
 
         input_container = QWidget()
         input_container.setStyleSheet("background-color: rgba(44, 44, 46, 1);")
@@ -204,27 +233,72 @@ class ChatOverlay(QWidget):
         self._send_callback = callback
 
     def add_message(self, role: str, content: str):
-        bubble = MessageBubble(role, content)
-        self.messages_layout.addWidget(bubble)
+        # Queue and insert on the next event-loop pass so a burst costs one layout
+        self._pending.append((role, content))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            QTimer.singleShot(0, self._flush_messages)
+
+    def _flush_messages(self):
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
 
-        self.scroll_area.verticalScrollBar().setValue(
-            self.scroll_area.verticalScrollBar().maximum()
-        )
+        self.messages_container.setUpdatesEnabled(False)
+        for role, content in pending:
+            if self._bubble_pool:
+                bubble = self._bubble_pool.pop()
+                bubble.configure(role, content)
+            else:
+                bubble = MessageBubble(role, content)
+            self.messages_layout.addWidget(bubble)
+            bubble.show()
+        self.messages_container.setUpdatesEnabled(True)
+
+        # The scroll range only grows after the deferred relayout; jump to the end then.
+        # If the range doesn't change, settle on the next pass so a later unrelated
+        # range change (e.g. a resize) doesn't yank the view
+        self._scroll_pending = True
+        QTimer.singleShot(0, self._settle_scroll)
+
+    def _on_scroll_range_changed(self, minimum: int, maximum: int):
+        if self._scroll_pending:
+            self._scroll_pending = False
+            self.scroll_area.verticalScrollBar().setValue(maximum)
+
+    def _settle_scroll(self):
+        if self._scroll_pending:
+            self._scroll_pending = False
+            scroll_bar = self.scroll_area.verticalScrollBar()
+            scroll_bar.setValue(scroll_bar.maximum())
 
     def focus_input(self):
         self.input_field.setFocus()
 
     def clear_messages(self):
+        self._pending.clear()
         while self.messages_layout.count():
             item = self.messages_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
+            widget = item.widget()
+            if isinstance(widget, MessageBubble):
+                widget.hide()
+                self._bubble_pool.append(widget)
+            elif widget:
+                widget.deleteLater()
 
     def showEvent(self, event):
         super().showEvent(event)
-        if self.parent():
-            parent = self.parent()
-            x = parent.width() - self.width() - 20
-            y = 20
-            self.move(x, y)
-            self.setFixedHeight(parent.height() - 40)
+        parent = self.parent()
+        if not parent:
+            return
+        geom = (parent.width() - self.width() - 20, 20, self.width(), parent.height() - 40)
+        # Toggling the overlay normally reopens it at the same spot; skip the relayout then
+        if geom == self._last_geom:
+            return
+        x, y, _, h = geom
+        self.setUpdatesEnabled(False)
+        self.move(x, y)
+        self.setFixedHeight(h)
+        self._last_geom = geom
+        self.setUpdatesEnabled(True)
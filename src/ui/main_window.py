@@ -3,42 +3,104 @@ Main application window with VM display and Live2D avatar overlay.
 Single OpenGL context renders both VM frame (as texture) and Live2D model.
 """
 
+import ctypes
 import logging
+import threading
+from dataclasses import dataclass
 from typing import Optional
 
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from OpenGL import GL
+from OpenGL.GL import shaders
+from PyQt6.QtCore import QElapsedTimer, Qt, QThreadPool, QTimer, pyqtSignal
 from PyQt6.QtGui import QImage, QKeyEvent
 from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout
 from PyQt6.QtOpenGLWidgets import QOpenGLWidget
 
 from ..avatar.live2d_renderer import Live2DRenderer
 from ..avatar.lip_sync import LipSyncController
+from .chat_overlay import ChatOverlay
 
 logger = logging.getLogger(__name__)
 
+# Textured quad for the VM frame: a unit quad covering the whole viewport, which is
+# set to the letterboxed frame rect. Image rows run top-down, hence the flipped v.
+# GLSL 1.20 so it runs on the compatibility context Live2D shares.
+_QUAD_VERTEX_SHADER = """
+#version 120
+attribute vec2 aPos;
+varying vec2 vUv;
+void main() {
+    vUv = vec2(aPos.x, 1.0 - aPos.y);
+    gl_Position = vec4(aPos * 2.0 - 1.0, 0.0, 1.0);
+}
+"""
+
+_QUAD_FRAGMENT_SHADER = """
+#version 120
+uniform sampler2D uTex;
+varying vec2 vUv;
+void main() {
+    gl_FragColor = texture2D(uTex, vUv);
+}
+"""
+
+_QUAD_VERTICES = (ctypes.c_float * 8)(0.0, 0.0, 1.0, 0.0, 0.0, 1.0, 1.0, 1.0)
+
+# Raw pixel layouts a producer can hand over instead of an encoded image
+RAW_FRAME_FORMATS = {
+    "rgb32": QImage.Format.Format_RGB32,
+    "rgba8888": QImage.Format.Format_RGBA8888,
+}
+
+
+@dataclass(slots=True)
+class VMFrame:
+    """A VM frame: encoded image bytes, or raw pixels when fmt is set."""
+    data: bytes
+    width: int = 0
+    height: int = 0
+    fmt: Optional[str] = None
+
 
 class CombinedGLWidget(QOpenGLWidget):
     """Single OpenGL widget that renders VM frame as texture + Live2D overlay."""
     
+    # Emitted from the decode worker; queued to the GUI thread to schedule a repaint
+    frame_decoded = pyqtSignal()
+    
     def __init__(self, avatar_renderer: Optional[Live2DRenderer] = None, parent=None):
         super().__init__(parent)
+        self.frame_decoded.connect(self.update)
         self.avatar_renderer = avatar_renderer
         self._gl_initialized = False
         self._model_loaded = False
         
         self._vm_texture_id = None
-        self._vm_frame_data: Optional[bytes] = None
         self._vm_frame_width = 0
         self._vm_frame_height = 0
-        self._vm_frame_updated = False
+        
+        # JPEG decode runs on the thread pool; paintGL only picks up the newest result.
+        # Frames arriving while a decode is running replace each other (drop-old).
+        self._decode_lock = threading.Lock()
+        self._pending_frame: Optional[VMFrame] = None
+        self._decoded_image: Optional[QImage] = None
+        self._decode_running = False
+        self._pbo_ids = None
+        self._pbo_sizes = [0, 0]
+        self._pbo_index = 0
+        self._quad_program = None
+        self._quad_vbo = None
+        self._quad_vao = None
+        self._quad_pos_loc = -1
+        # Set when a new VM frame is ready; Live2D animates every frame (idle motion,
+        # blink), so a loaded model always needs a repaint
+        self._dirty = True
         
         self._avatar_size = (400, 500)
         self._avatar_margin = 20
 
     def initializeGL(self):
         try:
-            from OpenGL import GL
-            
             GL.glClearColor(0.1, 0.1, 0.12, 1.0)
             GL.glEnable(GL.GL_BLEND)
             GL.glBlendFunc(GL.GL_SRC_ALPHA, GL.GL_ONE_MINUS_SRC_ALPHA)
@@ -50,6 +112,20 @@ class CombinedGLWidget(QOpenGLWidget):
             GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
             GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
             
+            # Two pixel-unpack buffers, alternated per frame, let the driver DMA one
+            # frame into the texture while the next is being written
+            try:
+                self._pbo_ids = list(GL.glGenBuffers(2))
+            except Exception as e:
+                logger.warning(f"Pixel buffer objects unavailable, using direct uploads: {e}")
+                self._pbo_ids = None
+            
+            try:
+                self._init_quad()
+            except Exception as e:
+                logger.warning(f"Quad shader unavailable, using fixed-function drawing: {e}")
+                self._quad_program = None
+            
             self._gl_initialized = True
             
             if self.avatar_renderer and self.avatar_renderer.has_live2d:
@@ -63,52 +139,132 @@ class CombinedGLWidget(QOpenGLWidget):
         except Exception as e:
             logger.error(f"OpenGL init failed: {e}")
 
-    def update_vm_frame(self, frame_data: bytes):
+    def _init_quad(self):
+        program = shaders.compileProgram(
+            shaders.compileShader(_QUAD_VERTEX_SHADER, GL.GL_VERTEX_SHADER),
+            shaders.compileShader(_QUAD_FRAGMENT_SHADER, GL.GL_FRAGMENT_SHADER),
+            validate=False
+        )
+        self._quad_pos_loc = GL.glGetAttribLocation(program, "aPos")
+        GL.glUseProgram(program)
+        GL.glUniform1i(GL.glGetUniformLocation(program, "uTex"), 0)
+        GL.glUseProgram(0)
+        
+        self._quad_vbo = GL.glGenBuffers(1)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self._quad_vbo)
+        GL.glBufferData(
+            GL.GL_ARRAY_BUFFER, ctypes.sizeof(_QUAD_VERTICES), _QUAD_VERTICES, GL.GL_STATIC_DRAW
+        )
+        
+        # A VAO captures the attribute setup once; plain GL 2.1 contexts set it per draw
+        try:
+            self._quad_vao = GL.glGenVertexArrays(1)
+            GL.glBindVertexArray(self._quad_vao)
+            self._bind_quad_attribs()
+            GL.glBindVertexArray(0)
+        except Exception:
+            self._quad_vao = None
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+        
+        self._quad_program = program
+
+    def _bind_quad_attribs(self):
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self._quad_vbo)
+        GL.glEnableVertexAttribArray(self._quad_pos_loc)
+        GL.glVertexAttribPointer(
+            self._quad_pos_loc, 2, GL.GL_FLOAT, GL.GL_FALSE, 0, ctypes.c_void_p(0)
+        )
+
+    def update_vm_frame(self, frame_data: bytes, width: int = 0, height: int = 0, fmt: Optional[str] = None):
         if not frame_data:
             return
-        self._vm_frame_data = frame_data
-        self._vm_frame_updated = True
+        with self._decode_lock:
+            self._pending_frame = VMFrame(frame_data, width, height, fmt)
+            if self._decode_running:
+                return
+            self._decode_running = True
+        QThreadPool.globalInstance().start(self._decode_frames)
+
+    def _decode_frames(self):
+        """Thread-pool worker: decode pending frames until none are left."""
+        while True:
+            with self._decode_lock:
+                frame = self._pending_frame
+                self._pending_frame = None
+                if frame is None:
+                    self._decode_running = False
+                    return
+            
+            raw_format = RAW_FRAME_FORMATS.get(frame.fmt)
+            if raw_format is not None:
+                # Known layout: wrap the pixels directly, no format sniffing or decoder
+                image = QImage(frame.data, frame.width, frame.height, 4 * frame.width, raw_format)
+            else:
+                image = QImage.fromData(frame.data)
+            if image.isNull():
+                continue
+            # RGB32/ARGB32 are BGRA bytes in memory on little-endian hosts, which GL takes
+            # as-is; JPEG decodes to RGB32, so this conversion is normally skipped
+            if image.format() not in (QImage.Format.Format_RGB32, QImage.Format.Format_ARGB32):
+                image = image.convertToFormat(QImage.Format.Format_RGB32)
+            
+            with self._decode_lock:
+                self._decoded_image = image
+            self._dirty = True
+            self.frame_decoded.emit()
 
     def _upload_vm_texture(self):
-        if not self._vm_frame_data or not self._vm_frame_updated:
+        with self._decode_lock:
+            image = self._decoded_image
+            self._decoded_image = None
+        if image is None:
             return
         
-        from OpenGL import GL
-        
-        image = QImage.fromData(self._vm_frame_data)
-        if image.isNull():
-            return
-        
-        image = image.convertToFormat(QImage.Format.Format_RGBA8888)
-        self._vm_frame_width = image.width()
-        self._vm_frame_height = image.height()
-        
-        ptr = image.bits()
-        ptr.setsize(image.sizeInBytes())
+        width, height = image.width(), image.height()
+        nbytes = image.sizeInBytes()
         
         GL.glBindTexture(GL.GL_TEXTURE_2D, self._vm_texture_id)
-        GL.glTexImage2D(
-            GL.GL_TEXTURE_2D, 0, GL.GL_RGBA,
-            self._vm_frame_width, self._vm_frame_height,
-            0, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, bytes(ptr)
-        )
-        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+        if width != self._vm_frame_width or height != self._vm_frame_height:
+            # Allocate storage only when the VM resolution changes
+            GL.glTexImage2D(
+                GL.GL_TEXTURE_2D, 0, GL.GL_RGBA8, width, height,
+                0, GL.GL_BGRA, GL.GL_UNSIGNED_BYTE, None
+            )
+            self._vm_frame_width = width
+            self._vm_frame_height = height
         
-        self._vm_frame_updated = False
+        if self._pbo_ids:
+            index = self._pbo_index
+            self._pbo_index ^= 1
+            GL.glBindBuffer(GL.GL_PIXEL_UNPACK_BUFFER, self._pbo_ids[index])
+            if self._pbo_sizes[index] != nbytes:
+                GL.glBufferData(GL.GL_PIXEL_UNPACK_BUFFER, nbytes, None, GL.GL_STREAM_DRAW)
+                self._pbo_sizes[index] = nbytes
+            dst = GL.glMapBufferRange(
+                GL.GL_PIXEL_UNPACK_BUFFER, 0, nbytes,
+                GL.GL_MAP_WRITE_BIT | GL.GL_MAP_INVALIDATE_BUFFER_BIT
+            )
+            if dst:
+                ctypes.memmove(dst, int(image.constBits()), nbytes)
+                GL.glUnmapBuffer(GL.GL_PIXEL_UNPACK_BUFFER)
+                GL.glTexSubImage2D(
+                    GL.GL_TEXTURE_2D, 0, 0, 0, width, height,
+                    GL.GL_BGRA, GL.GL_UNSIGNED_BYTE, ctypes.c_void_p(0)
+                )
+            GL.glBindBuffer(GL.GL_PIXEL_UNPACK_BUFFER, 0)
+        else:
+            # Hand GL the QImage's own pixels rather than a bytes copy of them
+            GL.glTexSubImage2D(
+                GL.GL_TEXTURE_2D, 0, 0, 0, width, height,
+                GL.GL_BGRA, GL.GL_UNSIGNED_BYTE, ctypes.c_void_p(int(image.constBits()))
+            )
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
 
     def _render_vm_frame(self):
-        from OpenGL import GL
-        
         if not self._vm_texture_id or self._vm_frame_width == 0:
             self._draw_connecting_message()
             return
         
-        GL.glMatrixMode(GL.GL_PROJECTION)
-        GL.glLoadIdentity()
-        GL.glOrtho(0, self.width(), self.height(), 0, -1, 1)
-        GL.glMatrixMode(GL.GL_MODELVIEW)
-        GL.glLoadIdentity()
-        
         widget_w, widget_h = self.width(), self.height()
         frame_w, frame_h = self._vm_frame_width, self._vm_frame_height
         
@@ -119,6 +275,43 @@ class CombinedGLWidget(QOpenGLWidget):
         x = (widget_w - scaled_w) // 2
         y = (widget_h - scaled_h) // 2
         
+        if self._quad_program is None:
+            self._render_vm_frame_fixed(x, y, scaled_w, scaled_h)
+            return
+        
+        # Letterbox through the viewport (device pixels, bottom-left origin)
+        ratio = self.devicePixelRatioF()
+        GL.glViewport(
+            round(x * ratio), round((widget_h - y - scaled_h) * ratio),
+            round(scaled_w * ratio), round(scaled_h * ratio)
+        )
+        GL.glUseProgram(self._quad_program)
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self._vm_texture_id)
+        
+        if self._quad_vao is not None:
+            # Live2D may leave its own VAO bound; put it back afterwards
+            previous_vao = GL.glGetIntegerv(GL.GL_VERTEX_ARRAY_BINDING)
+            GL.glBindVertexArray(self._quad_vao)
+            GL.glDrawArrays(GL.GL_TRIANGLE_STRIP, 0, 4)
+            GL.glBindVertexArray(previous_vao)
+        else:
+            self._bind_quad_attribs()
+            GL.glDrawArrays(GL.GL_TRIANGLE_STRIP, 0, 4)
+            GL.glDisableVertexAttribArray(self._quad_pos_loc)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+        
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+        GL.glUseProgram(0)
+        GL.glViewport(0, 0, round(widget_w * ratio), round(widget_h * ratio))
+
+    def _render_vm_frame_fixed(self, x: int, y: int, scaled_w: int, scaled_h: int):
+        GL.glMatrixMode(GL.GL_PROJECTION)
+        GL.glLoadIdentity()
+        GL.glOrtho(0, self.width(), self.height(), 0, -1, 1)
+        GL.glMatrixMode(GL.GL_MODELVIEW)
+        GL.glLoadIdentity()
+        
         GL.glEnable(GL.GL_TEXTURE_2D)
         GL.glBindTexture(GL.GL_TEXTURE_2D, self._vm_texture_id)
         GL.glColor4f(1.0, 1.0, 1.0, 1.0)
@@ -140,8 +333,6 @@ class CombinedGLWidget(QOpenGLWidget):
         if not self._model_loaded or not self.avatar_renderer:
             return
         
-        from OpenGL import GL
-        
         avatar_w, avatar_h = self._avatar_size
         avatar_x = self.width() - avatar_w - self._avatar_margin
         avatar_y = self._avatar_margin
@@ -160,12 +351,22 @@ class CombinedGLWidget(QOpenGLWidget):
         GL.glPopAttrib()
         GL.glViewport(0, 0, self.width(), self.height())
 
+    def mark_dirty(self):
+        self._dirty = True
+
+    @property
+    def needs_repaint(self) -> bool:
+        return self._dirty
+
+    @property
+    def is_animating(self) -> bool:
+        return self._model_loaded
+
     def paintGL(self):
         if not self._gl_initialized:
             return
         
-        from OpenGL import GL
-        
+        self._dirty = False
         try:
             GL.glClear(GL.GL_COLOR_BUFFER_BIT)
             
@@ -178,14 +379,17 @@ class CombinedGLWidget(QOpenGLWidget):
 
     def resizeGL(self, w: int, h: int):
         if self._gl_initialized:
-            from OpenGL import GL
             GL.glViewport(0, 0, w, h)
 
 
 class MainWindow(QMainWindow):
-    frame_received = pyqtSignal(bytes)
+    frame_received = pyqtSignal(object)
     chat_toggled = pyqtSignal(bool)
 
+    IDLE_REPAINT_INTERVAL_MS = 250
+    # Frame-time cap: frameSwapped can fire unthrottled when the swap interval is 0
+    MIN_FRAME_INTERVAL_MS = 16
+
     def __init__(
         self,
         avatar_renderer: Optional[Live2DRenderer] = None,
@@ -215,28 +419,54 @@ class MainWindow(QMainWindow):
         self.gl_widget = CombinedGLWidget(self.avatar_renderer, self)
         layout.addWidget(self.gl_widget)
 
-        from .chat_overlay import ChatOverlay
         self._chat_overlay = ChatOverlay(self)
         self._chat_overlay.hide()
 
     def _setup_timers(self):
+        # Animation is driven by frameSwapped (once per presented frame); this slow
+        # timer only keeps things ticking while no repaints are scheduled
+        self._frame_clock = QElapsedTimer()
+        self._frame_clock.start()
+        self._pump_deferred = False
         self.update_timer = QTimer(self)
-        self.update_timer.timeout.connect(self._on_update)
-        self.update_timer.start(16)
+        self.update_timer.timeout.connect(self._on_idle_tick)
+        self.update_timer.start(self.IDLE_REPAINT_INTERVAL_MS)
 
     def _connect_signals(self):
         self.frame_received.connect(self._on_frame_received)
-
-    def _on_update(self):
-        if self.lip_sync:
-            self.lip_sync.update(0.016)
-        self.gl_widget.update()
-
-    def _on_frame_received(self, frame_data: bytes):
-        self.gl_widget.update_vm_frame(frame_data)
-
-    def update_vm_frame(self, frame_data: bytes):
-        self.frame_received.emit(frame_data)
+        self.gl_widget.frameSwapped.connect(self._on_frame_swapped)
+
+    def _pump_frame(self, force: bool):
+        """Advance lip-sync and schedule at most one repaint."""
+        gl_widget = self.gl_widget
+        lip_sync = self.lip_sync
+        dt = self._frame_clock.restart() / 1000.0
+        # The Live2D idle animation advances every pump; pumps are rate-capped
+        if (lip_sync is not None and lip_sync.update(dt)) or gl_widget.is_animating:
+            gl_widget.mark_dirty()
+        if force or gl_widget.needs_repaint:
+            gl_widget.update()
+
+    def _on_frame_swapped(self):
+        remaining = self.MIN_FRAME_INTERVAL_MS - self._frame_clock.elapsed()
+        if remaining <= 0:
+            self._pump_frame(False)
+        elif not self._pump_deferred:
+            self._pump_deferred = True
+            QTimer.singleShot(remaining, self._on_deferred_pump)
+
+    def _on_deferred_pump(self):
+        self._pump_deferred = False
+        self._pump_frame(False)
+
+    def _on_idle_tick(self):
+        self._pump_frame(True)
+
+    def _on_frame_received(self, frame: VMFrame):
+        self.gl_widget.update_vm_frame(frame.data, frame.width, frame.height, frame.fmt)
+
+    def update_vm_frame(self, frame_data: bytes, width: int = 0, height: int = 0, fmt: Optional[str] = None):
+        self.frame_received.emit(VMFrame(frame_data, width, height, fmt))
 
     def process_audio(self, audio_data: bytes):
         if self.lip_sync:
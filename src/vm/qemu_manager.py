@@ -26,6 +26,9 @@ class VMConfig:
     vnc_port: int = 5900
     qmp_port: int = 4444
     enable_kvm: bool = True
+    # Opt-in via VM_DISK_AIO (e.g. "io_uring"): QEMU refuses to start if its build
+    # or sandbox lacks the backend
+    disk_aio: Optional[str] = None
     extra_args: list[str] = field(default_factory=list)
 
 
@@ -56,10 +59,12 @@ class QEMUManager:
         cmd.extend(["-smp", str(cfg.cpus)])
 
         if cfg.disk_path:
-            disk = Path(cfg.disk_path)
-            if not disk.exists():
-                self._create_disk(disk, cfg.disk_size)
-            cmd.extend(["-hda", str(disk)])
+            # QEMU option values escape a literal comma as ",,"
+            disk_file = str(Path(cfg.disk_path)).replace(",", ",,")
+            drive = f"file={disk_file},index=0,media=disk"
+            if cfg.disk_aio:
+                drive += f",aio={cfg.disk_aio}"
+            cmd.extend(["-drive", drive])
 
         if cfg.iso_path and Path(cfg.iso_path).exists():
             cmd.extend(["-cdrom", cfg.iso_path])
@@ -94,16 +99,19 @@ class QEMUManager:
 
         return cmd
 
-    def _create_disk(self, path: Path, size: str):
+    async def _create_disk(self, path: Path, size: str):
         qemu_img = shutil.which("qemu-img")
         if not qemu_img:
             raise RuntimeError("qemu-img not found")
 
-        import subprocess
-        subprocess.run([
-            qemu_img, "create", "-f", "qcow2",
-            str(path), size
-        ], check=True)
+        proc = await asyncio.create_subprocess_exec(
+            qemu_img, "create", "-f", "qcow2", str(path), size,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError(f"qemu-img create failed: {stderr.decode(errors='ignore').strip()}")
         logger.info(f"Created disk image: {path} ({size})")
 
     async def start(self) -> bool:
@@ -111,6 +119,10 @@ class QEMUManager:
             logger.warning("VM is already running")
             return True
 
+        cfg = self.config
+        if cfg.disk_path and not Path(cfg.disk_path).exists():
+            await self._create_disk(Path(cfg.disk_path), cfg.disk_size)
+
         cmd = self._build_command()
         logger.info(f"Starting QEMU: {' '.join(cmd)}")
 
@@ -121,7 +133,8 @@ class QEMUManager:
                 stderr=asyncio.subprocess.PIPE
             )
 
-            await asyncio.sleep(2)
+            if not await self._wait_for_qmp():
+                logger.warning("QMP port not accepting connections yet")
 
             if self._process.returncode is not None:
                 stderr = await self._process.stderr.read()
@@ -135,6 +148,23 @@ class QEMUManager:
             logger.error(f"Failed to start QEMU: {e}")
             return False
 
+    async def _wait_for_qmp(self, timeout: float = 5.0) -> bool:
+        """Poll the QMP port until it accepts, QEMU exits, or the timeout passes."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        delay = 0.02
+        while self._process.returncode is None and loop.time() < deadline:
+            try:
+                _, writer = await asyncio.open_connection(*self.qmp_address)
+            except OSError:
+                await asyncio.sleep(delay)
+                delay = min(delay * 1.5, 0.25)
+                continue
+            writer.close()
+            await writer.wait_closed()
+            return True
+        return False
+
     async def stop(self, force: bool = False):
         if not self._process:
             return
@@ -3,10 +3,23 @@ QMP (QEMU Machine Protocol) controller for keyboard/mouse input and screenshots.
 """
 
 import asyncio
+import itertools
 import json
 import logging
+from functools import lru_cache
 from typing import Any, Optional
 
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(data: dict) -> bytes:
+        return json.dumps(data).encode()
+
+    _loads = json.loads
+
 logger = logging.getLogger(__name__)
 
 KEY_MAP = {
@@ -36,6 +49,71 @@ KEY_MAP = {
 }
 
 
+@lru_cache(maxsize=512)
+def _normalize_key(key: str) -> str:
+    key_lower = key.lower()
+    return KEY_MAP.get(key_lower, key_lower)
+
+
+@lru_cache(maxsize=512)
+def _qcode_event(qcode: str) -> dict:
+    # Shared between requests; only ever serialized, never mutated
+    return {"type": "qcode", "data": qcode}
+
+
+# US-layout punctuation qcodes, without and with shift
+_PUNCT_QCODES = {
+    "-": "minus", "=": "equal", "[": "bracket_left", "]": "bracket_right",
+    "\\": "backslash", ";": "semicolon", "'": "apostrophe", "`": "grave_accent",
+    ",": "comma", ".": "dot", "/": "slash",
+}
+_SHIFTED_QCODES = {
+    "!": "1", "@": "2", "#": "3", "$": "4", "%": "5", "^": "6", "&": "7", "*": "8",
+    "(": "9", ")": "0", "_": "minus", "+": "equal", "{": "bracket_left",
+    "}": "bracket_right", "|": "backslash", ":": "semicolon", '"': "apostrophe",
+    "~": "grave_accent", "<": "comma", ">": "dot", "?": "slash",
+}
+
+
+def _build_ascii_keys() -> list[Optional[list[dict]]]:
+    table: list[Optional[list[dict]]] = [None] * 128
+    for char, qcode in (("\n", "ret"), ("\t", "tab"), (" ", "spc")):
+        table[ord(char)] = [_qcode_event(qcode)]
+    for char in "abcdefghijklmnopqrstuvwxyz0123456789":
+        table[ord(char)] = [_qcode_event(char)]
+    for char in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+        table[ord(char)] = [_qcode_event("shift"), _qcode_event(char.lower())]
+    for char, qcode in _PUNCT_QCODES.items():
+        table[ord(char)] = [_qcode_event(qcode)]
+    for char, qcode in _SHIFTED_QCODES.items():
+        table[ord(char)] = [_qcode_event("shift"), _qcode_event(qcode)]
+    return table
+
+
+# type_text fast path: ord(char) -> send-key "keys" list for printable ASCII
+_ASCII_KEYS = _build_ascii_keys()
+
+# Everything else, filled on first use of each char
+_CHAR_KEYS: dict[str, list[dict]] = {}
+
+
+def _char_keys(char: str) -> list[dict]:
+    keys = _CHAR_KEYS.get(char)
+    if keys is None:
+        if char == " ":
+            names = ["spc"]
+        elif char == "\n":
+            names = ["ret"]
+        elif char == "\t":
+            names = ["tab"]
+        elif char.isupper():
+            names = ["shift", _normalize_key(char.lower())]
+        else:
+            names = [_normalize_key(char)]
+        keys = _CHAR_KEYS[char] = [_qcode_event(n) for n in names]
+    return keys
+
+
 class QMPController:
     def __init__(self, host: str = "localhost", port: int = 4444):
         self.host = host
@@ -43,9 +121,20 @@ class QMPController:
         self._reader: Optional[asyncio.StreamReader] = None
         self._writer: Optional[asyncio.StreamWriter] = None
         self._connected = False
-        self._lock = asyncio.Lock()
-
-    async def connect(self, max_retries: int = 5, retry_delay: float = 1.0) -> bool:
+        # Requests carry an id and are matched to replies by one reader task, so
+        # several commands can be in flight on the connection at once
+        self._ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future] = {}
+        self._reader_task: Optional[asyncio.Task] = None
+        self._reconnect_lock = asyncio.Lock()
+        # Moves issued within one loop iteration collapse to the last position
+        self._pending_move: Optional[tuple[int, int]] = None
+        self._move_task: Optional[asyncio.Task] = None
+
+    async def connect(
+        self, max_retries: int = 30, retry_delay: float = 0.1, backoff: float = 1.1
+    ) -> bool:
+        # Poll with exponential backoff so a fast-booting QEMU is picked up immediately
         for attempt in range(max_retries):
             try:
                 self._reader, self._writer = await asyncio.open_connection(
@@ -60,12 +149,13 @@ class QMPController:
 
                 if "return" in response:
                     self._connected = True
+                    self._reader_task = asyncio.create_task(self._read_loop(self._reader))
                     logger.info("QMP connected successfully")
                     return True
 
             except ConnectionRefusedError:
                 if attempt < max_retries - 1:
-                    await asyncio.sleep(retry_delay)
+                    await asyncio.sleep(retry_delay * backoff ** attempt)
                 continue
             except Exception as e:
                 logger.error(f"QMP connection error: {e}")
@@ -74,86 +164,137 @@ class QMPController:
         return False
 
     async def disconnect(self):
+        self._connected = False
+        if self._reader_task:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
         if self._writer:
             self._writer.close()
             await self._writer.wait_closed()
-        self._connected = False
+            self._writer = None
+        self._fail_pending(ConnectionError("QMP disconnected"))
         logger.info("QMP disconnected")
 
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        """Dispatch replies to waiting requests by id; asynchronous events are dropped."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = _loads(line)
+                future = self._pending.pop(message.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"QMP reader error: {e}")
+        # Connection lost: the next execute() reconnects
+        if self._reader is reader:
+            self._connected = False
+            self._fail_pending(ConnectionError("QMP connection lost"))
+            logger.warning("QMP connection lost")
+
+    def _fail_pending(self, error: Exception):
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
     async def _send(self, data: dict):
         if not self._writer:
             raise RuntimeError("Not connected")
-        message = json.dumps(data) + "\n"
-        self._writer.write(message.encode())
+        self._writer.write(_dumps(data) + b"\n")
         await self._writer.drain()
 
     async def _receive(self) -> dict:
         if not self._reader:
             raise RuntimeError("Not connected")
         line = await self._reader.readline()
-        return json.loads(line.decode())
+        return _loads(line)
+
+    async def _ensure_connected(self):
+        if self._connected:
+            return
+        async with self._reconnect_lock:
+            if self._connected:
+                return
+            if self._writer:
+                self._writer.close()
+            if not await self.connect(max_retries=3):
+                raise RuntimeError("Not connected")
 
     async def execute(self, command: str, arguments: Optional[dict] = None) -> Any:
-        async with self._lock:
-            request = {"execute": command}
-            if arguments:
-                request["arguments"] = arguments
+        await self._ensure_connected()
 
-            await self._send(request)
-            response = await self._receive()
+        request_id = next(self._ids)
+        request = {"execute": command, "id": request_id}
+        if arguments:
+            request["arguments"] = arguments
 
-            while "event" in response:
-                response = await self._receive()
-
-            if "error" in response:
-                raise RuntimeError(f"QMP error: {response['error']}")
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self._send(request)
+            response = await future
+        finally:
+            self._pending.pop(request_id, None)
 
-            return response.get("return")
+        if "error" in response:
+            raise RuntimeError(f"QMP error: {response['error']}")
 
-    def _normalize_key(self, key: str) -> str:
-        key_lower = key.lower()
-        if key_lower in KEY_MAP:
-            return KEY_MAP[key_lower]
-        if len(key) == 1:
-            return key.lower()
-        return key_lower
+        return response.get("return")
 
     async def key_press(self, key: str, hold_time: float = 0.05):
-        qcode = self._normalize_key(key)
         await self.execute("send-key", {
-            "keys": [{"type": "qcode", "data": qcode}],
+            "keys": [_qcode_event(_normalize_key(key))],
             "hold-time": int(hold_time * 1000)
         })
 
     async def key_combo(self, keys: str, hold_time: float = 0.1):
-        key_list = [k.strip() for k in keys.split("+")]
-        qcodes = [{"type": "qcode", "data": self._normalize_key(k)} for k in key_list]
+        qcodes = [_qcode_event(_normalize_key(k.strip())) for k in keys.split("+")]
         await self.execute("send-key", {
             "keys": qcodes,
             "hold-time": int(hold_time * 1000)
         })
 
-    async def type_text(self, text: str, delay: float = 0.02):
+    async def type_text(self, text: str, hold_time: float = 0.03):
+        # QEMU queues send-key presses behind the previous key's hold-time, so keys
+        # arrive in order and spaced without sleeping between requests here
+        hold_ms = int(hold_time * 1000)
+        ascii_keys = _ASCII_KEYS
         for char in text:
-            if char == " ":
-                await self.key_press("space")
-            elif char == "\n":
-                await self.key_press("enter")
-            elif char == "\t":
-                await self.key_press("tab")
-            elif char.isupper():
-                await self.key_combo(f"shift+{char.lower()}")
-            else:
-                await self.key_press(char)
-            await asyncio.sleep(delay)
+            code = ord(char)
+            keys = ascii_keys[code] if code < 128 else None
+            if keys is None:
+                keys = _char_keys(char)
+            await self.execute("send-key", {"keys": keys, "hold-time": hold_ms})
+
+    @staticmethod
+    def _abs_events(x: int, y: int) -> list[dict]:
+        return [
+            {"type": "abs", "data": {"axis": "x", "value": x}},
+            {"type": "abs", "data": {"axis": "y", "value": y}}
+        ]
 
     async def mouse_move(self, x: int, y: int):
-        await self.execute("input-send-event", {
-            "events": [
-                {"type": "abs", "data": {"axis": "x", "value": x}},
-                {"type": "abs", "data": {"axis": "y", "value": y}}
-            ]
-        })
+        self._pending_move = (x, y)
+        if self._move_task is None:
+            self._move_task = asyncio.create_task(self._flush_move())
+        # Shielded so one cancelled caller does not drop the move for the others
+        await asyncio.shield(self._move_task)
+
+    async def _flush_move(self):
+        await asyncio.sleep(0)
+        x, y = self._pending_move
+        self._pending_move = None
+        self._move_task = None
+        await self.execute("input-send-event", {"events": self._abs_events(x, y)})
 
     async def mouse_click(self, button: str = "left"):
         btn_map = {"left": 0, "middle": 1, "right": 2}
@@ -173,22 +314,23 @@ class QMPController:
         await self.mouse_click(button)
 
     async def mouse_drag(self, start_x: int, start_y: int, end_x: int, end_y: int):
-        await self.mouse_move(start_x, start_y)
-        await asyncio.sleep(0.05)
-
+        # QEMU syncs the guest once per input-send-event, so each batch is one input
+        # frame: position and button change can share one, but the path between
+        # press and release needs frames of its own or the guest sees no motion
         await self.execute("input-send-event", {
-            "events": [{"type": "btn", "data": {"down": True, "button": 0}}]
+            "events": self._abs_events(start_x, start_y)
+            + [{"type": "btn", "data": {"down": True, "button": 0}}]
         })
 
         steps = 20
-        for i in range(1, steps + 1):
+        for i in range(1, steps):
             x = start_x + (end_x - start_x) * i // steps
             y = start_y + (end_y - start_y) * i // steps
             await self.mouse_move(x, y)
-            await asyncio.sleep(0.01)
 
         await self.execute("input-send-event", {
-            "events": [{"type": "btn", "data": {"down": False, "button": 0}}]
+            "events": self._abs_events(end_x, end_y)
+            + [{"type": "btn", "data": {"down": False, "button": 0}}]
         })
 
     async def screenshot(self, filename: str = "/tmp/screenshot.ppm") -> str:
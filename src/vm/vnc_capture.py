@@ -6,13 +6,138 @@ Pure Python RFB (VNC) protocol implementation - no twisted dependency.
 import asyncio
 import io
 import logging
+import socket
 import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Optional
 
+import numpy as np
 from PIL import Image
 
 logger = logging.getLogger(__name__)
 
+# Called with (frame, width, height, fmt); fmt is None for encoded images (JPEG/WebP)
+# and names the pixel layout for raw frames
+FrameCallback = Callable[[bytes, int, int, Optional[str]], None]
+
+# Fixed-size RFB messages, compiled once
+_U32 = struct.Struct('>I')
+# width, height, 16-byte pixel format (bpp, depth, big-endian, true-colour,
+# r/g/b max, r/g/b shift, 3 pad), desktop name length
+_SERVER_INIT = struct.Struct('>HHBBBBHHHBBBxxxI')
+_FBU_REQUEST = struct.Struct('>BBHHHH')
+_FBU_HEADER = struct.Struct('>xH')
+_RECT_HEADER = struct.Struct('>HHHHi')
+_COPYRECT = struct.Struct('>HH')
+_COLOUR_MAP_HEADER = struct.Struct('>xHH')
+_CUT_TEXT_HEADER = struct.Struct('>xxxI')
+
+# SetPixelFormat: 32bpp little-endian true colour, BGRX byte order in memory
+_SET_PIXEL_FORMAT_BGRX = struct.pack(
+    '>BBBB BBBB HHH BBB xxx',
+    0,        # message type
+    0, 0, 0,  # padding
+    32,       # bpp
+    24,       # depth
+    0,        # big-endian (false)
+    1,        # true-color (true)
+    255, 255, 255,  # r/g/b max
+    16, 8, 0  # r/g/b shift (BGRA format)
+)
+
+# OpenCV's SIMD colour conversion for the BGRX -> RGB swizzle; NumPy otherwise
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+# libjpeg-turbo's SIMD encoder when available; Pillow otherwise
+try:
+    from turbojpeg import TJPF_RGB, TJSAMP_420, TurboJPEG
+    TURBOJPEG_AVAILABLE = True
+except ImportError:
+    TURBOJPEG_AVAILABLE = False
+
+
+class _SocketStream:
+    """Buffered reads over a non-blocking socket via the loop's sock_* calls.
+
+    Small protocol fields are served from a reusable receive buffer; large payloads
+    are received straight into the caller's buffer with sock_recv_into.
+    """
+
+    def __init__(self, sock: socket.socket, buffer_size: int = 65536):
+        self._sock = sock
+        self._loop = asyncio.get_running_loop()
+        self._buf = bytearray(buffer_size)
+        self._start = 0
+        self._end = 0
+
+    @classmethod
+    async def connect(cls, host: str, port: int) -> "_SocketStream":
+        loop = asyncio.get_running_loop()
+        last_error: Optional[OSError] = None
+        for family, type_, proto, _, address in await loop.getaddrinfo(
+            host, port, type=socket.SOCK_STREAM
+        ):
+            sock = socket.socket(family, type_, proto)
+            sock.setblocking(False)
+            try:
+                await loop.sock_connect(sock, address)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError as e:
+                sock.close()
+                last_error = e
+                continue
+            except BaseException:
+                # Timeout/cancellation from the caller's wait_for: don't leak the fd
+                sock.close()
+                raise
+            return cls(sock)
+        raise last_error or OSError(f"Cannot resolve {host}:{port}")
+
+    async def _fill(self, needed: int):
+        if self._start == self._end:
+            self._start = self._end = 0
+        if len(self._buf) - self._start < needed:
+            # Compact (and grow if a single field outsizes the buffer)
+            data = self._buf[self._start:self._end]
+            if len(self._buf) < needed:
+                self._buf = bytearray(needed)
+            self._buf[:len(data)] = data
+            self._start, self._end = 0, len(data)
+        n = await self._loop.sock_recv_into(self._sock, memoryview(self._buf)[self._end:])
+        if n == 0:
+            raise asyncio.IncompleteReadError(bytes(self._buf[self._start:self._end]), needed)
+        self._end += n
+
+    async def readexactly(self, n: int) -> bytes:
+        while self._end - self._start < n:
+            await self._fill(n)
+        data = bytes(self._buf[self._start:self._start + n])
+        self._start += n
+        return data
+
+    async def readinto(self, view: memoryview):
+        """Fill view completely: buffered bytes first, then straight from the socket."""
+        size = len(view)
+        pos = min(size, self._end - self._start)
+        view[:pos] = self._buf[self._start:self._start + pos]
+        self._start += pos
+        while pos < size:
+            n = await self._loop.sock_recv_into(self._sock, view[pos:])
+            if n == 0:
+                raise asyncio.IncompleteReadError(b"", size)
+            pos += n
+
+    async def send(self, data: bytes):
+        await self._loop.sock_sendall(self._sock, data)
+
+    def close(self):
+        self._sock.close()
+
 
 class VNCCapture:
     """Async VNC client using pure Python RFB protocol."""
@@ -23,9 +148,16 @@ class VNCCapture:
     # Message types
     MSG_FRAMEBUFFER_UPDATE_REQUEST = 3
     MSG_FRAMEBUFFER_UPDATE = 0
+    MSG_SET_COLOUR_MAP_ENTRIES = 1
+    MSG_BELL = 2
+    MSG_SERVER_CUT_TEXT = 3
     
     # Encoding types
     ENCODING_RAW = 0
+    ENCODING_COPYRECT = 1
+
+    # Frame formats handed to the frame callback
+    ENCODINGS = ("jpeg", "webp", "raw")
     
     def __init__(
         self,
@@ -33,19 +165,27 @@ class VNCCapture:
         port: int = 5900,
         width: int = 1920,
         height: int = 1080,
-        fps: int = 30
+        fps: int = 30,
+        encoding: str = "jpeg"
     ):
+        if encoding not in self.ENCODINGS:
+            raise ValueError(f"Unsupported frame encoding: {encoding}")
         self.host = host
         self.port = port
         self.target_width = width
         self.target_height = height
         self.fps = fps
+        self.encoding = encoding
 
-        self._reader: Optional[asyncio.StreamReader] = None
-        self._writer: Optional[asyncio.StreamWriter] = None
+        self._stream: Optional[_SocketStream] = None
         self._running = False
         self._capture_task: Optional[asyncio.Task] = None
-        self._frame_callback: Optional[Callable[[bytes], None]] = None
+        # Every subscriber receives the same encoded bytes object; one encode per frame
+        self._frame_callbacks: list[FrameCallback] = []
+        # Async callbacks run as tasks; while one is busy only its newest frame is kept
+        self._callback_tasks: dict[Callable, asyncio.Task] = {}
+        self._callback_latest: dict[Callable, tuple] = {}
+        self.dropped_frames = 0
         
         # Framebuffer
         self._fb_width = 0
@@ -55,68 +195,95 @@ class VNCCapture:
         self._fb_bigendian = False
         self._fb_truecolor = True
         self._pixel_format = None
-        self._framebuffer: Optional[Image.Image] = None
+        # RGB, (height, width, 3); rects are written in place
+        self._framebuffer: Optional[np.ndarray] = None
         self._last_frame: Optional[bytes] = None
+        self._last_frame_size = (0, 0)
+        # Output buffer for capture_frame_raw, reallocated only on desktop resize
+        self._raw_out: Optional[np.ndarray] = None
+        # Set when an update wrote pixels since the last encode
+        self._fb_dirty = False
+        # Reused receive buffer for RAW rect payloads, grown to the largest rect seen
+        self._rect_buf = bytearray()
+        # Outstanding update requests; one is kept in flight, re-sent as each update
+        # arrives so the server prepares the next frame while this one is decoded.
+        # QEMU folds repeated incremental requests into one, so more would not help.
+        self._pending_updates = 0
+        # Held while an update's rects are applied so snapshots never see half an update
+        self._fb_lock = asyncio.Lock()
+        # Pillow releases the GIL while encoding, so JPEG work overlaps the event loop
+        self._encoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vnc-encode")
+        # Pillow output buffer, rewound per frame; only touched from the single encode worker
+        self._encode_buf = io.BytesIO()
+        self._turbo = None
+        if TURBOJPEG_AVAILABLE:
+            try:
+                self._turbo = TurboJPEG()
+            except Exception as e:
+                logger.debug(f"libturbojpeg not loadable, using Pillow for JPEG: {e}")
+        self._encoder_fn = {
+            "jpeg": self._encode_jpeg,
+            "webp": self._encode_webp,
+            "raw": None,
+        }[encoding]
+        # Raw frames are BGRX, which is QImage.Format_RGB32 on little-endian hosts
+        self.frame_format: Optional[str] = "rgb32" if encoding == "raw" else None
 
-    async def connect(self, max_retries: int = 10, retry_delay: float = 1.0) -> bool:
+    async def connect(
+        self, max_retries: int = 10, retry_delay: float = 0.1, backoff: float = 1.5
+    ) -> bool:
         """Connect to VNC server using RFB protocol."""
         for attempt in range(max_retries):
             try:
-                self._reader, self._writer = await asyncio.wait_for(
-                    asyncio.open_connection(self.host, self.port),
+                if self._stream:
+                    self._stream.close()
+                self._stream = await asyncio.wait_for(
+                    _SocketStream.connect(self.host, self.port),
                     timeout=5.0
                 )
                 
                 # Protocol version handshake
-                server_version = await self._reader.read(12)
+                server_version = await self._stream.readexactly(12)
                 logger.debug(f"Server version: {server_version}")
-                self._writer.write(self.RFB_VERSION)
-                await self._writer.drain()
+                await self._stream.send(self.RFB_VERSION)
                 
                 # Security handshake
-                num_security_types = await self._reader.read(1)
+                num_security_types = await self._stream.readexactly(1)
                 if num_security_types == b'\x00':
                     # Connection failed, read reason
-                    reason_len = struct.unpack('>I', await self._reader.read(4))[0]
-                    reason = await self._reader.read(reason_len)
+                    reason_len, = _U32.unpack(await self._stream.readexactly(4))
+                    reason = await self._stream.readexactly(reason_len)
                     logger.error(f"VNC connection refused: {reason.decode()}")
                     return False
                 
-                security_types = await self._reader.read(num_security_types[0])
+                security_types = await self._stream.readexactly(num_security_types[0])
                 logger.debug(f"Security types: {list(security_types)}")
                 
                 # Select None authentication (type 1) if available
                 if 1 in security_types:
-                    self._writer.write(b'\x01')  # None auth
-                    await self._writer.drain()
+                    await self._stream.send(b'\x01')  # None auth
                 else:
                     logger.error("No supported security type (need None auth)")
                     return False
                 
                 # Security result
-                security_result = struct.unpack('>I', await self._reader.read(4))[0]
+                security_result, = _U32.unpack(await self._stream.readexactly(4))
                 if security_result != 0:
                     logger.error(f"Security handshake failed: {security_result}")
                     return False
                 
                 # ClientInit - shared flag
-                self._writer.write(b'\x01')  # Shared
-                await self._writer.drain()
+                await self._stream.send(b'\x01')  # Shared
                 
                 # ServerInit
-                server_init = await self._reader.read(24)
-                self._fb_width, self._fb_height = struct.unpack('>HH', server_init[:4])
-                
-                # Pixel format (16 bytes)
-                pf = server_init[4:20]
-                self._fb_bpp = pf[0]
-                self._fb_depth = pf[1]
-                self._fb_bigendian = pf[2] != 0
-                self._fb_truecolor = pf[3] != 0
-                
-                # Red, green, blue max and shift
-                r_max, g_max, b_max = struct.unpack('>HHH', pf[4:10])
-                r_shift, g_shift, b_shift = pf[10], pf[11], pf[12]
+                (
+                    self._fb_width, self._fb_height,
+                    self._fb_bpp, self._fb_depth, bigendian, truecolor,
+                    r_max, g_max, b_max, r_shift, g_shift, b_shift,
+                    name_len
+                ) = _SERVER_INIT.unpack(await self._stream.readexactly(_SERVER_INIT.size))
+                self._fb_bigendian = bigendian != 0
+                self._fb_truecolor = truecolor != 0
                 
                 self._pixel_format = {
                     'bpp': self._fb_bpp,
@@ -128,15 +295,17 @@ class VNCCapture:
                 }
                 
                 # Desktop name
-                name_len = struct.unpack('>I', server_init[20:24])[0]
-                desktop_name = await self._reader.read(name_len)
+                desktop_name = await self._stream.readexactly(name_len)
                 
                 logger.info(f"VNC connected to {self.host}:{self.port} - "
                            f"{self._fb_width}x{self._fb_height} {self._fb_bpp}bpp "
                            f"'{desktop_name.decode(errors='ignore')}'")
                 
+                self._pending_updates = 0
+                
                 # Initialize framebuffer
-                self._framebuffer = Image.new('RGB', (self._fb_width, self._fb_height), (0, 0, 0))
+                self._framebuffer = np.zeros((self._fb_height, self._fb_width, 3), dtype=np.uint8)
+                self._fb_dirty = True
                 
                 # Set pixel format to 32-bit BGRA for easier handling
                 await self._set_pixel_format()
@@ -152,27 +321,14 @@ class VNCCapture:
                 logger.debug(f"VNC connection attempt {attempt + 1} failed: {e}")
             
             if attempt < max_retries - 1:
-                await asyncio.sleep(retry_delay)
+                await asyncio.sleep(retry_delay * backoff ** attempt)
         
         logger.error(f"VNC connection failed after {max_retries} attempts")
         return False
 
     async def _set_pixel_format(self):
         """Set pixel format to 32-bit BGRA."""
-        # SetPixelFormat message
-        msg = struct.pack(
-            '>BBBB BBBB HHH BBB xxx',
-            0,        # message type
-            0, 0, 0,  # padding
-            32,       # bpp
-            24,       # depth
-            0,        # big-endian (false)
-            1,        # true-color (true)
-            255, 255, 255,  # r/g/b max
-            16, 8, 0  # r/g/b shift (BGRA format)
-        )
-        self._writer.write(msg)
-        await self._writer.drain()
+        await self._stream.send(_SET_PIXEL_FORMAT_BGRX)
         
         self._fb_bpp = 32
         self._pixel_format = {
@@ -183,75 +339,102 @@ class VNCCapture:
 
     async def _set_encodings(self):
         encodings = [
+            self.ENCODING_COPYRECT,
             self.ENCODING_RAW,
             -223,  # DesktopSize pseudo-encoding (handle resolution changes)
         ]
-        msg = struct.pack('>BBH', 2, 0, len(encodings))
-        for enc in encodings:
-            msg += struct.pack('>i', enc)
-        self._writer.write(msg)
-        await self._writer.drain()
+        msg = struct.pack(f'>BBH{len(encodings)}i', 2, 0, len(encodings), *encodings)
+        await self._stream.send(msg)
 
     async def _request_framebuffer_update(self, incremental: bool = True):
         """Request framebuffer update from server."""
-        msg = struct.pack(
-            '>BBHHHH',
+        msg = _FBU_REQUEST.pack(
             self.MSG_FRAMEBUFFER_UPDATE_REQUEST,
             1 if incremental else 0,
             0, 0,  # x, y
             self._fb_width, self._fb_height
         )
-        self._writer.write(msg)
-        await self._writer.drain()
+        self._pending_updates += 1
+        await self._stream.send(msg)
 
     async def _read_framebuffer_update(self) -> bool:
         """Read and process framebuffer update message."""
         try:
             # Read message type
-            msg_type = await asyncio.wait_for(self._reader.read(1), timeout=0.5)
-            if not msg_type:
-                return False
-            
+            msg_type = await asyncio.wait_for(self._stream.readexactly(1), timeout=0.5)
             msg_type = msg_type[0]
             
             if msg_type == self.MSG_FRAMEBUFFER_UPDATE:
                 # Framebuffer update
-                header = await self._reader.read(3)
-                num_rects = struct.unpack('>xH', header)[0]
+                num_rects, = _FBU_HEADER.unpack(await self._stream.readexactly(_FBU_HEADER.size))
+                
+                # Ask for the next update before decoding this one
+                self._pending_updates = max(0, self._pending_updates - 1)
+                if self._running and not self._pending_updates:
+                    await self._request_framebuffer_update(incremental=True)
                 
-                for _ in range(num_rects):
-                    rect_header = await self._reader.read(12)
-                    x, y, w, h, encoding = struct.unpack('>HHHHi', rect_header)
+                async with self._fb_lock:
+                    for _ in range(num_rects):
+                        x, y, w, h, encoding = _RECT_HEADER.unpack(
+                            await self._stream.readexactly(_RECT_HEADER.size)
+                        )
                     
-                    if encoding == self.ENCODING_RAW:
-                        # Read raw pixel data
-                        bytes_per_pixel = self._fb_bpp // 8
-                        data_len = w * h * bytes_per_pixel
-                        pixel_data = b''
-                        while len(pixel_data) < data_len:
-                            chunk = await self._reader.read(min(data_len - len(pixel_data), 65536))
-                            if not chunk:
-                                break
-                            pixel_data += chunk
+                        if encoding == self.ENCODING_RAW:
+                            # One readexactly per rect: a single buffer, no chunked concatenation
+                            data_len = w * h * (self._fb_bpp // 8)
+                            if len(self._rect_buf) < data_len:
+                                self._rect_buf = bytearray(data_len)
+                            await self._stream.readinto(memoryview(self._rect_buf)[:data_len])
                         
-                        # Update framebuffer
-                        if len(pixel_data) == data_len and self._framebuffer:
-                            rect_img = Image.frombytes('RGBX', (w, h), pixel_data, 'raw', 'BGRX')
-                            self._framebuffer.paste(rect_img.convert('RGB'), (x, y))
+                            # Update framebuffer
+                            if self._framebuffer is not None:
+                                rect = np.frombuffer(self._rect_buf, dtype=np.uint8, count=data_len)
+                                rect = rect.reshape(h, w, 4)
+                                dst = self._framebuffer[y:y + h, x:x + w]
+                                if CV2_AVAILABLE:
+                                    # SIMD BGRX -> RGB written in place into the framebuffer view
+                                    cv2.cvtColor(rect, cv2.COLOR_BGRA2RGB, dst=dst)
+                                else:
+                                    dst[...] = rect[:, :, 2::-1]
+                                self._fb_dirty = True
                     
-                    elif encoding == -223:  # DesktopSize pseudo-encoding
-                        # Desktop resize
-                        self._fb_width = w
-                        self._fb_height = h
-                        self._framebuffer = Image.new('RGB', (w, h), (0, 0, 0))
-                        logger.info(f"VNC desktop resized to {w}x{h}")
+                        elif encoding == self.ENCODING_COPYRECT:
+                            # Scrolls and window moves arrive as a source offset, not pixels
+                            src_x, src_y = _COPYRECT.unpack(
+                                await self._stream.readexactly(_COPYRECT.size)
+                            )
+                            if self._framebuffer is not None:
+                                # NumPy buffers overlapping slices, so in-place moves are safe
+                                self._framebuffer[y:y + h, x:x + w] = \
+                                    self._framebuffer[src_y:src_y + h, src_x:src_x + w]
+                                self._fb_dirty = True
                     
-                    else:
-                        logger.warning(f"Unsupported encoding: {encoding}")
+                        elif encoding == -223:  # DesktopSize pseudo-encoding
+                            # Desktop resize
+                            self._fb_width = w
+                            self._fb_height = h
+                            self._framebuffer = np.zeros((h, w, 3), dtype=np.uint8)
+                            self._fb_dirty = True
+                            logger.info(f"VNC desktop resized to {w}x{h}")
+                    
+                        else:
+                            logger.warning(f"Unsupported encoding: {encoding}")
                 
                 return True
             else:
-                # Skip other message types
+                # Consume other server messages so the stream stays in sync
+                if msg_type == self.MSG_SET_COLOUR_MAP_ENTRIES:
+                    _, count = _COLOUR_MAP_HEADER.unpack(
+                        await self._stream.readexactly(_COLOUR_MAP_HEADER.size)
+                    )
+                    await self._stream.readexactly(6 * count)
+                elif msg_type == self.MSG_SERVER_CUT_TEXT:
+                    length, = _CUT_TEXT_HEADER.unpack(
+                        await self._stream.readexactly(_CUT_TEXT_HEADER.size)
+                    )
+                    await self._stream.readexactly(length)
+                elif msg_type != self.MSG_BELL:
+                    logger.warning(f"Unknown VNC message type: {msg_type}")
                 logger.debug(f"Ignoring message type: {msg_type}")
                 return False
                 
@@ -272,54 +455,108 @@ class VNCCapture:
             except asyncio.CancelledError:
                 pass
         
-        if self._writer:
-            try:
-                self._writer.close()
-                await self._writer.wait_closed()
-            except Exception:
-                pass
+        if self._stream:
+            self._stream.close()
         
-        self._reader = None
-        self._writer = None
+        self._stream = None
         self._framebuffer = None
         logger.info("VNC disconnected")
 
     async def capture_frame(self) -> Optional[bytes]:
-        """Capture current framebuffer as JPEG (native resolution)."""
-        if not self._writer or not self._framebuffer:
+        """Capture current framebuffer in the configured encoding (native resolution)."""
+        if not self._stream or self._framebuffer is None:
             return self._last_frame
         
         try:
-            # Request update and process response
-            await self._request_framebuffer_update(incremental=True)
+            # Request update (unless one is already in flight) and process response
+            if not self._pending_updates:
+                await self._request_framebuffer_update(incremental=True)
             await self._read_framebuffer_update()
             
-            # Convert framebuffer to JPEG at native resolution
-            # UI layer handles scaling to maintain proper aspect ratio
-            buffer = io.BytesIO()
-            self._framebuffer.save(buffer, format="JPEG", quality=85)
-            self._last_frame = buffer.getvalue()
+            # Nothing changed since the last encode: hand back the same frame object
+            if not self._fb_dirty and self._last_frame is not None:
+                return self._last_frame
+            
+            self._last_frame = await self._encode_framebuffer()
             return self._last_frame
             
         except Exception as e:
             logger.error(f"Frame capture error: {e}")
             return self._last_frame
 
-    async def capture_frame_raw(self) -> Optional[bytes]:
-        """Capture current framebuffer as raw RGB bytes."""
-        if not self._framebuffer:
+    async def _encode_framebuffer(self) -> bytes:
+        # Encode at native resolution; UI layer handles scaling to maintain
+        # proper aspect ratio. Raw mode is a single swizzle, no codec work.
+        async with self._fb_lock:
+            self._fb_dirty = False
+            self._last_frame_size = (self._framebuffer.shape[1], self._framebuffer.shape[0])
+            if self._encoder_fn is None:
+                return self._encode_bgrx(self._framebuffer)
+            snapshot = self._framebuffer.copy()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._encoder, self._encoder_fn, snapshot
+        )
+
+    def _encode_jpeg(self, framebuffer: np.ndarray, quality: int = 85) -> bytes:
+        if self._turbo is not None:
+            return self._turbo.encode(
+                framebuffer, quality=quality, pixel_format=TJPF_RGB, jpeg_subsample=TJSAMP_420
+            )
+        buffer = self._rewound_encode_buf()
+        Image.fromarray(framebuffer, 'RGB').save(buffer, format="JPEG", quality=quality)
+        return buffer.getvalue()
+
+    def _encode_webp(self, framebuffer: np.ndarray, quality: int = 80) -> bytes:
+        buffer = self._rewound_encode_buf()
+        Image.fromarray(framebuffer, 'RGB').save(buffer, format="WEBP", quality=quality, method=0)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _encode_bgrx(framebuffer: np.ndarray) -> bytes:
+        if CV2_AVAILABLE:
+            return cv2.cvtColor(framebuffer, cv2.COLOR_RGB2BGRA).tobytes()
+        height, width, _ = framebuffer.shape
+        bgrx = np.empty((height, width, 4), dtype=np.uint8)
+        bgrx[:, :, :3] = framebuffer[:, :, ::-1]
+        bgrx[:, :, 3] = 255
+        return bgrx.tobytes()
+
+    def _rewound_encode_buf(self) -> io.BytesIO:
+        self._encode_buf.seek(0)
+        self._encode_buf.truncate()
+        return self._encode_buf
+
+    async def capture_frame_raw(self) -> Optional[memoryview]:
+        """Capture current framebuffer as raw RGB bytes.
+
+        The returned read-only view is reused and overwritten by the next call; copy it
+        with bytes() before hashing it or keeping it past that.
+        """
+        if self._framebuffer is None:
             return None
         
         try:
-            await self._request_framebuffer_update(incremental=True)
+            if not self._pending_updates:
+                await self._request_framebuffer_update(incremental=True)
             await self._read_framebuffer_update()
-            return self._framebuffer.tobytes()
+            if self._raw_out is None or self._raw_out.shape != self._framebuffer.shape:
+                self._raw_out = np.empty_like(self._framebuffer)
+            np.copyto(self._raw_out, self._framebuffer)
+            return self._raw_out.data.cast('B').toreadonly()
         except Exception as e:
             logger.error(f"Raw frame capture error: {e}")
             return None
 
-    def set_frame_callback(self, callback: Callable[[bytes], None]):
-        self._frame_callback = callback
+    def set_frame_callback(self, callback: FrameCallback):
+        self._frame_callbacks = [callback]
+
+    def add_frame_callback(self, callback: FrameCallback):
+        if callback not in self._frame_callbacks:
+            self._frame_callbacks.append(callback)
+
+    def remove_frame_callback(self, callback: FrameCallback):
+        if callback in self._frame_callbacks:
+            self._frame_callbacks.remove(callback)
 
     async def start_streaming(self):
         """Start streaming frames to callback."""
@@ -327,24 +564,58 @@ class VNCCapture:
         self._capture_task = asyncio.create_task(self._stream_loop())
 
     async def _stream_loop(self):
-        """Async loop that captures frames and calls callback."""
-        frame_interval = 1.0 / self.fps
-        
+        """Run the update reader and the encoder side by side, so reading frame N
+        from the socket overlaps encoding frame N-1."""
         # Request initial full framebuffer
-        if self._writer:
+        if self._stream:
             await self._request_framebuffer_update(incremental=False)
-        
+        await asyncio.gather(self._update_loop(), self._encode_loop())
+
+    async def _update_loop(self):
+        """Keep the framebuffer current, reading at most one update per frame interval."""
+        frame_interval = 1.0 / self.fps
+        next_deadline = time.monotonic()
         while self._running:
             try:
-                start_time = asyncio.get_event_loop().time()
+                if not self._pending_updates:
+                    await self._request_framebuffer_update(incremental=True)
+                await self._read_framebuffer_update()
                 
-                frame = await self.capture_frame()
-                if frame and self._frame_callback:
-                    self._frame_callback(frame)
+                next_deadline += frame_interval
+                delay = next_deadline - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    next_deadline = time.monotonic()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Stream read error: {e}")
+                await asyncio.sleep(0.1)
+
+    async def _encode_loop(self):
+        """Encode and deliver the framebuffer at most once per frame interval."""
+        frame_interval = 1.0 / self.fps
+        
+        # Pace against absolute deadlines so encode time doesn't accumulate as drift
+        next_deadline = time.monotonic()
+        while self._running:
+            try:
+                # Unchanged frames are not re-encoded or re-delivered
+                if self._fb_dirty and self._framebuffer is not None:
+                    self._last_frame = await self._encode_framebuffer()
+                    width, height = self._last_frame_size
+                    args = (self._last_frame, width, height, self.frame_format)
+                    for callback in tuple(self._frame_callbacks):
+                        self._dispatch_frame(callback, args)
                 
-                elapsed = asyncio.get_event_loop().time() - start_time
-                if elapsed < frame_interval:
-                    await asyncio.sleep(frame_interval - elapsed)
+                next_deadline += frame_interval
+                delay = next_deadline - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    # Fell behind: resync instead of bursting to catch up
+                    next_deadline = time.monotonic()
                     
             except asyncio.CancelledError:
                 break
@@ -352,6 +623,32 @@ class VNCCapture:
                 logger.error(f"Stream error: {e}")
                 await asyncio.sleep(0.1)
 
+    def _dispatch_frame(self, callback: Callable, args: tuple):
+        if not asyncio.iscoroutinefunction(callback):
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"Frame callback error: {e}")
+            return
+        task = self._callback_tasks.get(callback)
+        if task and not task.done():
+            # Consumer still busy: replace its pending frame rather than stall capture
+            if callback in self._callback_latest:
+                self.dropped_frames += 1
+            self._callback_latest[callback] = args
+            return
+        self._callback_tasks[callback] = asyncio.create_task(
+            self._run_async_callback(callback, args)
+        )
+
+    async def _run_async_callback(self, callback: Callable, args: Optional[tuple]):
+        while args is not None:
+            try:
+                await callback(*args)
+            except Exception as e:
+                logger.error(f"Frame callback error: {e}")
+            args = self._callback_latest.pop(callback, None)
+
     async def stop_streaming(self):
         self._running = False
         if self._capture_task:
@@ -366,7 +663,7 @@ class VNCCapture:
 
     @property
     def is_connected(self) -> bool:
-        return self._writer is not None
+        return self._stream is not None
 
     @property
     def is_streaming(self) -> bool: